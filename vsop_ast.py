@@ -17,16 +17,29 @@
 __author__  = "Adrien"
 __version__ = '3.0'
 
+import io
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from vsop_lexer import SourceFile
 
+# Nodes have fixed slots and no __dict__. The position of a node is always
+# its offset in the source, Program and New have none. The Program keeps the
+# SourceFile that turns offsets into lines and columns.
 class Node:
-  def __init__(self, lineno, column):
-    self.line = lineno
-    self.column = column
+  __slots__ = ('offset',)
+
+  def __init__(self, offset):
+    self.offset = offset
 
 
 class Program(Node):
-  def __init__(self, list_class=[]):
+  __slots__ = ('list_class', 'source')
+
+  def __init__(self, list_class=[], source=None):
     self.list_class = list_class
+    self.source = source
 
   def add(self, cl):
     self.list_class.append(cl)
@@ -42,18 +55,21 @@ class Program(Node):
 
 
 class Class(Node):
-  def __init__(self, name, fields, methods, lineno, column, parent="Object", parent_lineno=None, parent_column=None):
+  # The position of a class is the line of its 'class' keyword (offset) and
+  # the column of its name (name_offset)
+  __slots__ = ('name', 'fields', 'methods', 'parent', 'name_offset', 'parent_offset',
+    'inhe_fields', 'inhe_methods')
+
+  def __init__(self, name, fields, methods, offset, name_offset, parent="Object", parent_offset=None):
     self.name = name
     self.fields = fields
     self.methods = methods
     self.parent = parent
-    self.lineno= lineno
-    self.column= column
-    self.parent_lineno = parent_lineno
-    self.parent_column = parent_column
+    self.offset = offset
+    self.name_offset = name_offset
+    self.parent_offset = parent_offset
     self.inhe_fields=None
     self.inhe_methods=None
-    self.all_parents=[]
    
   def __str__(self):
     if isinstance(self.fields, dict) and isinstance(self.methods, dict):
@@ -69,12 +85,13 @@ class Class(Node):
 
 
 class Field(Node):
-  def __init__(self, name, type, lineno, column, init_expr=None):
+  __slots__ = ('name', 'type', 'init_expr')
+
+  def __init__(self, name, type, offset, init_expr=None):
     self.name = name
     self.type = type
     self.init_expr = init_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
     
   
   def __str__(self):
@@ -90,13 +107,14 @@ class Field(Node):
 
 
 class Method(Node):
-  def __init__(self, name, formals, ret_type, lineno, column, block):
+  __slots__ = ('name', 'formals', 'ret_type', 'block')
+
+  def __init__(self, name, formals, ret_type, offset, block):
     self.name = name
     self.formals = formals
     self.ret_type = ret_type
     self.block = block
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
     
   def __str__(self):
     if isinstance(self.formals,dict):
@@ -113,24 +131,31 @@ class Method(Node):
 
 
 class Formal(Node):
-  def __init__(self, name, type, lineno, column):
+  __slots__ = ('name', 'type')
+
+  def __init__(self, name, type, offset):
     self.name = name
     self.type = type
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
     
   
   def __str__(self):
     return f"{self.name} : {self.type}"
 
 
-class If(Node):
-  def __init__(self, cond_expr, then_expr, lineno, column, else_expr=None):
+# The static type of an expression is set by VsopSem, a parsed tree has none
+class Expression(Node):
+  __slots__ = ('static_type',)
+
+
+class If(Expression):
+  __slots__ = ('cond_expr', 'then_expr', 'else_expr')
+
+  def __init__(self, cond_expr, then_expr, offset, else_expr=None):
     self.cond_expr = cond_expr
     self.then_expr = then_expr
     self.else_expr = else_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
     
     
 
@@ -161,12 +186,13 @@ class If(Node):
            f"{', ' + str(else_expr) if else_expr else ''})"
 
 
-class While(Node):
-  def __init__(self, cond_expr, body_expr, lineno, column):
+class While(Expression):
+  __slots__ = ('cond_expr', 'body_expr')
+
+  def __init__(self, cond_expr, body_expr, offset):
     self.cond_expr = cond_expr
     self.body_expr = body_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
     
     
     
@@ -189,24 +215,26 @@ class While(Node):
     return f"While({cond_expr}, {body_expr})"
 
 class Local_variable(Node):
-  def __init__(self, name, type, init_expr, lineno, column):
+  __slots__ = ('name', 'type', 'init_expr')
+
+  def __init__(self, name, type, init_expr, offset):
     self.name = name
     self.type = type
     self.init_expr = init_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     return f"{self.name}, "\
            f"{self.type} " \
            f"{', ' + str(self.init_expr) if self.init_expr else ''} " 
     
-class Let(Node):
-  def __init__(self, name, type, scope_expr, lineno, column,lineno_lv,column_lv,init_expr=None):
-    self.local_var= Local_variable(name,type,init_expr,lineno_lv,column_lv)
+class Let(Expression):
+  __slots__ = ('local_var', 'scope_expr')
+
+  def __init__(self, name, type, scope_expr, offset, offset_lv, init_expr=None):
+    self.local_var= Local_variable(name,type,init_expr,offset_lv)
     self.scope_expr = scope_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     if isinstance(self.scope_expr, list) and len(self.scope_expr) > 1:
@@ -219,50 +247,54 @@ class Let(Node):
            f"{scope_expr})"
 
 
-class Assign(Node):
-  def __init__(self, name, expr,lineno,column):
+class Assign(Expression):
+  __slots__ = ('id', 'expr')
+
+  def __init__(self, name, expr, offset):
     if isinstance(name, str):
-      self.id = Object_identifier(name,lineno,column)
+      self.id = Object_identifier(name, offset)
     else:
       self.id = name
 
     self.expr = expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
   def __str__(self):
     return f"Assign({self.id.name}, {self.expr})"
 
 
-class UnOp(Node):
-  def __init__(self, op, expr,lineno,column):
+class UnOp(Expression):
+  __slots__ = ('op', 'expr')
+
+  def __init__(self, op, expr, offset):
     self.op = op
     self.expr = expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     return f"UnOp({self.op}, {self.expr})"
 
 
-class BinOp(Node):
-  def __init__(self, op, left_expr, right_expr,lineno,column):
+class BinOp(Expression):
+  __slots__ = ('op', 'left_expr', 'right_expr')
+
+  def __init__(self, op, left_expr, right_expr, offset):
     self.op = op
     self.left_expr = left_expr
     self.right_expr = right_expr
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     return f"BinOp({self.op}, {self.left_expr}, {self.right_expr})"
 
 
-class Call(Node):
-  def __init__(self, method_name, lineno, column ,arg=[], obj_expr="self"):
+class Call(Expression):
+  __slots__ = ('obj_expr', 'method_name', 'arg')
+
+  def __init__(self, method_name, offset, arg=[], obj_expr="self"):
     self.obj_expr = obj_expr
     self.method_name = method_name
     self.arg = arg
-    self.lineno= lineno
-    self.column= column
+    self.offset = offset
 
   def __str__(self):
     if isinstance(self.arg, list):
@@ -274,36 +306,41 @@ class Call(Node):
            f"{arg})"
 
 
-class New(Node):
+class New(Expression):
+  __slots__ = ('type_name',)
+
   def __init__(self, type_name):
     self.type_name = type_name
 
   def __str__(self):
     return f"New({self.type_name})"
 
-class Literal(Node):
-  def __init__(self, literal,lineno, column):
+class Literal(Expression):
+  __slots__ = ('literal',)
+
+  def __init__(self, literal, offset):
     self.literal = literal
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     return str(self.literal)
 
-class Object_identifier(Node):
-  def __init__(self, name, lineno, column):
+class Object_identifier(Expression):
+  __slots__ = ('name',)
+
+  def __init__(self, name, offset):
     self.name = name
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     return self.name
 
-class Block(Node):
-  def __init__(self, block, lineno, column):
+class Block(Expression):
+  __slots__ = ('block',)
+
+  def __init__(self, block, offset):
     self.block = block
-    self.lineno = lineno
-    self.column = column
+    self.offset = offset
 
   def __str__(self):
     if isinstance(self.block, list) and len(self.block) > 1:
@@ -312,3 +349,682 @@ class Block(Node):
       return str(self.block[0])
     else:
       return self.block
+
+### TYPES
+# The static types VsopSem gives the expressions. There is one Type per
+# name, from type_named(), so types compare by identity. A class type is a
+# ClassType and holds only the name of its class, the error type is the
+# type of an expression that has an error.
+class Type():
+  __slots__ = ('name',)
+
+  def __init__(self, name):
+    self.name = name
+
+  def __str__(self):
+    return self.name
+
+  def __repr__(self):
+    return f"{type(self).__name__}({self.name})"
+
+  def __reduce__(self):
+    # Unpickled as the interned type
+    return type_named, (self.name,)
+
+class ClassType(Type):
+  __slots__ = ()
+
+interned_types = {name : Type(name) for name in ("unit", "bool", "int32", "string", "error")}
+unit_type = interned_types["unit"]
+bool_type = interned_types["bool"]
+int32_type = interned_types["int32"]
+string_type = interned_types["string"]
+error_type = interned_types["error"]
+
+def type_named(name):
+  # The primitive type of that name, else the class type
+  found = interned_types.get(name)
+  if found is None:
+    found = interned_types[name] = ClassType(name)
+  return found
+
+def slot_names(cls):
+  # The slots of a node class and of its bases
+  names = slot_cache.get(cls)
+  if names is None:
+    names = slot_cache[cls] = tuple(name for base in cls.__mro__
+      for name in getattr(base, '__slots__', ()))
+  return names
+
+slot_cache = {}
+
+def walk(node):
+  # Every Node of a subtree, through lists and dicts, without recursion
+  stack = [node]
+  while stack:
+    node = stack.pop()
+    if isinstance(node, list):
+      stack.extend(node)
+    elif isinstance(node, dict):
+      stack.extend(node.values())
+    elif isinstance(node, Node):
+      yield node
+      stack.extend(getattr(node, name, None) for name in slot_names(type(node)))
+
+def shift_offsets(node, delta):
+  # Moves a whole subtree by delta characters of its source
+  for node in walk(node):
+    for name in ('offset', 'name_offset', 'parent_offset'):
+      if getattr(node, name, None) is not None:
+        setattr(node, name, getattr(node, name) + delta)
+
+
+### VISITORS
+# A Visitor subclass handles a node class with a visit_<class name> method,
+# visit(node, *args) calls it with the extra arguments. Methods are kept in
+# the dispatch table of the visitor class, keyed by node class and filled on
+# first use through the MRO (facades get the method of their node class).
+# Values without a method (lists, strings, None) go to default(). Hot
+# recursive visitors call self.dispatch[type(node)](self, node, ...) instead
+# of visit(): one call per node and no packing of the arguments.
+class VisitorTable(dict):
+  def __init__(self, visitor):
+    super().__init__()
+    self.visitor = visitor
+
+  def __missing__(self, node_cls):
+    visitor = self.visitor
+    method = self[node_cls] = next((getattr(visitor, 'visit_' + base.__name__)
+      for base in node_cls.__mro__ if hasattr(visitor, 'visit_' + base.__name__)),
+      visitor.default)
+    return method
+
+class Visitor:
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    cls.dispatch = VisitorTable(cls)
+
+  def visit(self, node, *args):
+    return self.dispatch[type(node)](self, node, *args)
+
+  def default(self, node, *args):
+    return None
+
+Visitor.dispatch = VisitorTable(Visitor)
+
+
+### PRINTER
+# write_tree(node, out) writes str(node) to out without building it: each
+# node is expanded into fragments and child nodes on an explicit stack. The
+# TreeExpander methods follow the __str__ methods case by case.
+def joined(nodes):
+  items = []
+  for node in nodes:
+    items.append(node)
+    items.append(", ")
+  if items:
+    items.pop()
+  return items
+
+def folded(expr):
+  # A list of several expressions prints as a list, a list of one as its
+  # expression
+  if isinstance(expr, list) and len(expr) > 1:
+    return ["[", *joined(expr), "]"]
+  if isinstance(expr, list) and len(expr):
+    return [expr[0]]
+  return [expr]
+
+def folded_truth(expr):
+  if isinstance(expr, list) and len(expr) > 1:
+    return True
+  if isinstance(expr, list) and len(expr):
+    return bool(str(expr[0]))
+  return bool(expr)
+
+class TreeExpander(Visitor):
+  # The fragments and child nodes of each node class, leaves (Literal,
+  # Object_identifier) and anything else print through str()
+  def visit_Program(self, node):
+    classes = node.list_class
+    if isinstance(classes, dict):
+      classes = classes.copy()
+      del classes['Object']
+      classes = classes.values()
+    return ["[", *joined(classes), "]"]
+
+  def visit_Class(self, node):
+    if isinstance(node.fields, dict) and isinstance(node.methods, dict):
+      fields, methods = node.fields.values(), node.methods.values()
+    else:
+      fields, methods = node.fields, node.methods
+    return ["Class(", node.name, ", ", node.parent, ", [", *joined(fields), "], [",
+      *joined(methods), "])"]
+
+  def visit_Field(self, node):
+    items = ["Field(", node.name, ", ", node.type]
+    if folded_truth(node.init_expr):
+      items += [", ", *folded(node.init_expr)]
+    items.append(")")
+    return items
+
+  def visit_Method(self, node):
+    formals = node.formals.values() if isinstance(node.formals, dict) else node.formals
+    return ["Method(", node.name, ", [", *joined(formals), "], ", node.ret_type, ", ",
+      node.block, ")"]
+
+  def visit_Formal(self, node):
+    return [node.name, " : ", node.type]
+
+  def visit_If(self, node):
+    items = ["If(", *folded(node.cond_expr), ", ", *folded(node.then_expr)]
+    if folded_truth(node.else_expr):
+      items += [", ", *folded(node.else_expr)]
+    items.append(")")
+    return items
+
+  def visit_While(self, node):
+    return ["While(", *folded(node.cond_expr), ", ", *folded(node.body_expr), ")"]
+
+  def visit_Local_variable(self, node):
+    return [node.name, ", ", node.type, " ",
+      *([", ", node.init_expr] if node.init_expr else []), " "]
+
+  def visit_Let(self, node):
+    return ["Let(", node.local_var, ", ", *folded(node.scope_expr), ")"]
+
+  def visit_Assign(self, node):
+    return ["Assign(", node.id.name, ", ", node.expr, ")"]
+
+  def visit_UnOp(self, node):
+    return ["UnOp(", node.op, ", ", node.expr, ")"]
+
+  def visit_BinOp(self, node):
+    return ["BinOp(", node.op, ", ", node.left_expr, ", ", node.right_expr, ")"]
+
+  def visit_Call(self, node):
+    arg = ["[", *joined(node.arg), "]"] if isinstance(node.arg, list) else ["[", node.arg, "]"]
+    return ["Call(", node.obj_expr, ", ", node.method_name, ", ", *arg, ")"]
+
+  def visit_New(self, node):
+    return ["New(", node.type_name, ")"]
+
+  def visit_Block(self, node):
+    if isinstance(node.block, list) and len(node.block) > 1:
+      return ["[", *joined(node.block), "]"]
+    if isinstance(node.block, list) and len(node.block):
+      return [node.block[0]]
+    if isinstance(node.block, str):
+      return [node.block]
+    raise TypeError(f"__str__ returned non-string (type {type(node.block).__name__})")
+
+def write_tree(node, out, chunk_size=1 << 14):
+  # chunk_size is the number of fragments joined for each out.write
+  expander = TreeExpander()
+  table = TreeExpander.dispatch
+  stack = [node]
+  chunk = []
+  pop, push, append = stack.pop, stack.extend, chunk.append
+  while stack:
+    item = pop()
+    cls = type(item)
+    if cls is not str:
+      items = table[cls](expander, item)
+      if items is not None:
+        push(reversed(items))
+        continue
+      item = str(item)
+    append(item)
+    if len(chunk) >= chunk_size:
+      out.write("".join(chunk))
+      chunk.clear()
+  out.write("".join(chunk))
+
+def tree_text(node):
+  # str(node) for a tree of any depth, as the messages that quote one need
+  out = io.StringIO()
+  write_tree(node, out)
+  return out.getvalue()
+
+
+### NODE BUILDERS
+class NodeBuilder:
+  # What the parsers build the tree with, one node object per node
+  Program = Program
+  Class = Class
+  Field = Field
+  Method = Method
+  Formal = Formal
+  If = If
+  While = While
+  Let = Let
+  Assign = Assign
+  UnOp = UnOp
+  BinOp = BinOp
+  Call = Call
+  New = New
+  Literal = Literal
+  Object_identifier = Object_identifier
+  Block = Block
+
+  def Boolean(self, value, offset):
+    return Literal(Literal(value, offset), offset)
+
+  def node(self, node):
+    return node
+
+
+# Node kinds of an AstArena
+(NONE, PROGRAM, CLASS, TYPE, FIELD, METHOD, FORMAL, IF, WHILE, LET,
+  LOCAL_VARIABLE, ASSIGN, UNOP, BINOP, CALL, SELF_CALL, NEW, LITERAL,
+  OBJECT_IDENTIFIER, BLOCK) = range(20)
+
+class AstArena:
+  # A whole tree in parallel arrays, one entry per node: kind, offset (-1
+  # for none), value (index in the interned values, -1 for none)
+  # and the range of its children in the shared children array. Child 0 is
+  # a missing one (no init_expr, no else_expr). Types are TYPE children,
+  # shared when they have no position.
+  # The constructors take the arguments of the node classes and return node
+  # ids, Program returns a facade of the root. Facades subclass the node
+  # classes and decode their node on first access, so VsopSem and the
+  # printers run on them unchanged.
+  def __init__(self):
+    self.kind = array('B', [NONE])
+    self.offset = array('i', [-1])
+    self.value = array('i', [-1])
+    self.first = array('i', [0])
+    self.count = array('i', [0])
+    self.children = array('i')
+    self.values = []
+    self.value_ids = {}
+    self.types = {}
+    self.root = 0
+    self.source = None
+
+  def __len__(self):
+    return len(self.kind)
+
+  def add(self, kind, value, offset, children=()):
+    self.kind.append(kind)
+    self.offset.append(-1 if offset is None else offset)
+    if value is None:
+      self.value.append(-1)
+    else:
+      index = self.value_ids.get(value)
+      if index is None:
+        index = self.value_ids[value] = len(self.values)
+        self.values.append(value)
+      self.value.append(index)
+    self.first.append(len(self.children))
+    self.count.append(len(children))
+    if children:
+      if None in children:
+        # Error recovery leaves holes in lists
+        children = [child or 0 for child in children]
+      self.children.extend(children)
+    return len(self.kind) - 1
+
+  def type_node(self, name, offset=None):
+    if offset is not None:
+      return self.add(TYPE, name, offset)
+    node = self.types.get(name)
+    if node is None:
+      node = self.types[name] = self.add(TYPE, name, None)
+    return node
+
+### CONSTRUCTORS
+  def Program(self, list_class, source=None):
+    self.root = self.add(PROGRAM, None, None, list_class)
+    self.source = source
+    return self.node(self.root)
+
+  def Class(self, name, fields, methods, offset, name_offset, parent="Object", parent_offset=None):
+    # The name is also a TYPE child, for its offset
+    return self.add(CLASS, name, offset, [self.type_node(parent, parent_offset),
+      self.type_node(name, name_offset)] + fields + methods)
+
+  def Field(self, name, type, offset, init_expr=None):
+    return self.add(FIELD, name, offset, (self.type_node(type), init_expr or 0))
+
+  def Method(self, name, formals, ret_type, offset, block):
+    return self.add(METHOD, name, offset,
+      [self.type_node(ret_type)] + formals + [block])
+
+  def Formal(self, name, type, offset):
+    return self.add(FORMAL, name, offset, (self.type_node(type),))
+
+  def If(self, cond_expr, then_expr, offset, else_expr=None):
+    return self.add(IF, None, offset, (cond_expr, then_expr, else_expr or 0))
+
+  def While(self, cond_expr, body_expr, offset):
+    return self.add(WHILE, None, offset, (cond_expr, body_expr))
+
+  def Let(self, name, type, scope_expr, offset, offset_lv, init_expr=None):
+    local_var = self.add(LOCAL_VARIABLE, name, offset_lv,
+      (self.type_node(type), init_expr or 0))
+    return self.add(LET, None, offset, (local_var, scope_expr))
+
+  def Assign(self, name, expr, offset):
+    return self.add(ASSIGN, name, offset, (expr,))
+
+  def UnOp(self, op, expr, offset):
+    return self.add(UNOP, op, offset, (expr,))
+
+  def BinOp(self, op, left_expr, right_expr, offset):
+    return self.add(BINOP, op, offset, (left_expr, right_expr))
+
+  def Call(self, method_name, offset, arg=[], obj_expr="self"):
+    if obj_expr == "self":
+      return self.add(SELF_CALL, method_name, offset, arg)
+    return self.add(CALL, method_name, offset, [obj_expr] + arg)
+
+  def New(self, type_name):
+    return self.add(NEW, type_name, None)
+
+  def Literal(self, literal, offset):
+    return self.add(LITERAL, literal, offset)
+
+  def Boolean(self, value, offset):
+    return self.add(LITERAL, None, offset, (self.add(LITERAL, value, offset),))
+
+  def Object_identifier(self, name, offset):
+    return self.add(OBJECT_IDENTIFIER, name, offset)
+
+  def Block(self, block, offset):
+    return self.add(BLOCK, None, offset, block)
+
+### FACADES
+  def node(self, index):
+    node = flat_classes[self.kind[index]].__new__(flat_classes[self.kind[index]])
+    node.arena = self
+    node.index = index
+    return node
+
+  def child(self, index):
+    return self.node(index) if index else None
+
+  def type_name(self, index):
+    value = self.value[index]
+    return self.values[value] if value >= 0 else None
+
+  def decode(self, node, index):
+    # Fills every slot of a facade, as the node class constructor would
+    kind = self.kind[index]
+    offset = self.offset[index]
+    if offset >= 0:
+      node.offset = offset
+    value = self.values[self.value[index]] if self.value[index] >= 0 else None
+    first = self.first[index]
+    children = self.children[first:first + self.count[index]]
+    child = self.child
+    if kind == PROGRAM:
+      node.list_class = [child(i) for i in children]
+      node.source = self.source
+    elif kind == CLASS:
+      parent = children[0]
+      node.name = value
+      node.parent = self.type_name(parent)
+      node.parent_offset = self.offset[parent] if self.offset[parent] >= 0 else None
+      node.name_offset = self.offset[children[1]]
+      node.fields = [child(i) for i in children[2:] if self.kind[i] == FIELD]
+      node.methods = [child(i) for i in children[2:] if self.kind[i] == METHOD]
+      node.inhe_fields = None
+      node.inhe_methods = None
+    elif kind == FIELD or kind == LOCAL_VARIABLE:
+      node.name = value
+      node.type = self.type_name(children[0])
+      node.init_expr = child(children[1])
+    elif kind == METHOD:
+      node.name = value
+      node.ret_type = self.type_name(children[0])
+      node.formals = [child(i) for i in children[1:-1]]
+      node.block = child(children[-1])
+    elif kind == FORMAL:
+      node.name = value
+      node.type = self.type_name(children[0])
+    elif kind == IF:
+      node.cond_expr, node.then_expr, node.else_expr = map(child, children)
+    elif kind == WHILE:
+      node.cond_expr, node.body_expr = map(child, children)
+    elif kind == LET:
+      node.local_var, node.scope_expr = map(child, children)
+    elif kind == ASSIGN:
+      node.id = Object_identifier(value, offset)
+      node.expr = child(children[0])
+    elif kind == UNOP:
+      node.op = value
+      node.expr = child(children[0])
+    elif kind == BINOP:
+      node.op = value
+      node.left_expr, node.right_expr = map(child, children)
+    elif kind == CALL:
+      node.method_name = value
+      node.obj_expr = child(children[0])
+      node.arg = [child(i) for i in children[1:]]
+    elif kind == SELF_CALL:
+      node.method_name = value
+      node.obj_expr = "self"
+      node.arg = [child(i) for i in children]
+    elif kind == NEW:
+      node.type_name = value
+    elif kind == LITERAL:
+      node.literal = child(children[0]) if children else value
+    elif kind == OBJECT_IDENTIFIER:
+      node.name = value
+    elif kind == BLOCK:
+      node.block = [child(i) for i in children]
+
+
+class FlatNode:
+  __slots__ = ()
+
+  def __getattr__(self, name):
+    # Only reached for a slot not filled yet, the node is decoded once
+    if name.startswith('__') or name in ('arena', 'index'):
+      raise AttributeError(name)
+    arena = self.arena
+    if arena is None:
+      raise AttributeError(f"'{type(self).__bases__[0].__name__}' object has no attribute '{name}'")
+    self.arena = None
+    arena.decode(self, self.index)
+    return getattr(self, name)
+
+flat_classes = {kind : type('Flat' + cls.__name__, (cls, FlatNode),
+    {'__slots__' : ('arena', 'index'), '__module__' : __name__})
+  for kind, cls in ((PROGRAM, Program), (CLASS, Class), (FIELD, Field),
+    (METHOD, Method), (FORMAL, Formal), (IF, If), (WHILE, While), (LET, Let),
+    (LOCAL_VARIABLE, Local_variable), (ASSIGN, Assign), (UNOP, UnOp),
+    (BINOP, BinOp), (CALL, Call), (SELF_CALL, Call), (NEW, New),
+    (LITERAL, Literal), (OBJECT_IDENTIFIER, Object_identifier), (BLOCK, Block))}
+
+
+### SERIALIZATION
+# dump(program, fileobj) writes a tree, parsed or checked, in a binary form
+# that load(fileobj) reads back much faster than lexing, parsing and checking
+# again. After a header come a table of the distinct strings and a post
+# order stream of int32 codes (int64 if one does not fit), each a tag in its
+# 4 low bits and an argument above: a string or a small int, the size of a
+# list or a dict made of the values before it, the kind of a node made of
+# its slot values. A node met twice (inherited methods and fields of a
+# checked program) is written once then referenced, load gives back the
+# same sharing. Facades are written as their node class and read as it. The
+# SourceFile of the program is written as its text, so that the offsets of
+# the nodes keep their positions, and a static type as its name.
+class FormatError(Exception):
+  pass
+
+FORMAT_MAGIC = b"VSOPAST\0"
+FORMAT_VERSION = 4
+format_header = struct.Struct("<8sHBIII")
+
+# Tags of the codes
+(CODE_STR, CODE_INT, CODE_BIG_INT, CODE_NONE, CODE_TRUE, CODE_FALSE, CODE_UNSET,
+  CODE_LIST, CODE_DICT, CODE_NODE, CODE_REF, CODE_SOURCE, CODE_TYPE) = range(13)
+
+# Node kinds of the format. A node is its slots in slot_names order, so a
+# change of slots or of this tuple needs a new FORMAT_VERSION.
+format_classes = (Program, Class, Field, Method, Formal, If, While,
+  Local_variable, Let, Assign, UnOp, BinOp, Call, New, Literal,
+  Object_identifier, Block)
+format_kinds = {cls : kind for kind, cls in enumerate(format_classes)}
+
+def format_kind(cls):
+  if cls not in format_kinds:
+    format_kinds[cls] = next((format_kinds[base] for base in cls.__mro__[1:]
+      if base in format_kinds), None)
+  return format_kinds[cls]
+
+unset = object()
+
+def dump(program, fileobj):
+  strings = {}
+  codes = array('q')
+  memo = {}
+  append = codes.append
+  stack = [(program, False)]
+  while stack:
+    value, done = stack.pop()
+    cls = type(value)
+    if done:
+      # Every child is written
+      if cls is list:
+        append(len(value) << 4 | CODE_LIST)
+      elif cls is dict:
+        append(len(value) << 4 | CODE_DICT)
+      else:
+        memo[id(value)] = len(memo)
+        append(format_kind(cls) << 4 | CODE_NODE)
+    elif cls is str:
+      append(strings.setdefault(value, len(strings)) << 4 | CODE_STR)
+    elif value is None:
+      append(CODE_NONE)
+    elif value is True or value is False:
+      append(CODE_TRUE if value else CODE_FALSE)
+    elif value is unset:
+      append(CODE_UNSET)
+    elif cls is int:
+      if -1 << 58 <= value < 1 << 58:
+        append(value << 4 | CODE_INT)
+      else:
+        append(strings.setdefault(str(value), len(strings)) << 4 | CODE_BIG_INT)
+    elif cls is list:
+      stack.append((value, True))
+      stack.extend((item, False) for item in reversed(value))
+    elif cls is dict:
+      stack.append((value, True))
+      for key, item in reversed(value.items()):
+        stack.append((item, False))
+        stack.append((key, False))
+    elif cls is SourceFile:
+      append(strings.setdefault(value.text, len(strings)) << 4 | CODE_SOURCE)
+    elif cls is Type or cls is ClassType:
+      append(strings.setdefault(value.name, len(strings)) << 4 | CODE_TYPE)
+    elif isinstance(value, Mapping):
+      # The shared tables of a checked class, written as dicts
+      stack.append((dict(value.items()), False))
+    elif id(value) in memo:
+      append(memo[id(value)] << 4 | CODE_REF)
+    elif format_kind(cls) is not None:
+      stack.append((value, True))
+      stack.extend((getattr(value, name, unset), False)
+        for name in reversed(slot_names(format_classes[format_kind(cls)])))
+    else:
+      raise TypeError(f"cannot dump a {cls.__name__}")
+
+  if codes and -1 << 31 <= min(codes) and max(codes) < 1 << 31:
+    codes = array('i', codes)
+  text = "".join(strings).encode("utf-8", "surrogatepass")
+  lengths = array('I', map(len, strings))
+  if sys.byteorder == "big":
+    lengths.byteswap()
+    codes.byteswap()
+  fileobj.write(format_header.pack(FORMAT_MAGIC, FORMAT_VERSION, codes.itemsize,
+    len(lengths), len(text), len(codes)))
+  fileobj.write(lengths.tobytes())
+  fileobj.write(text)
+  fileobj.write(codes.tobytes())
+
+def load(fileobj):
+  header = fileobj.read(format_header.size)
+  if len(header) < format_header.size or header[:8] != FORMAT_MAGIC:
+    raise FormatError("not a VSOP AST file")
+  _, version, code_size, string_count, text_size, code_count = \
+    format_header.unpack(header)
+  if version != FORMAT_VERSION:
+    raise FormatError(f"unsupported format version {version}")
+  if code_size not in (4, 8):
+    raise FormatError("corrupt VSOP AST file")
+  lengths = array('I')
+  codes = array('i' if code_size == 4 else 'q')
+  try:
+    lengths.frombytes(fileobj.read(string_count * lengths.itemsize))
+    text = fileobj.read(text_size).decode("utf-8", "surrogatepass")
+    codes.frombytes(fileobj.read(code_count * codes.itemsize))
+  except ValueError:
+    raise FormatError("truncated VSOP AST file")
+  if len(lengths) != string_count or len(codes) != code_count:
+    raise FormatError("truncated VSOP AST file")
+  if sys.byteorder == "big":
+    lengths.byteswap()
+    codes.byteswap()
+  # Names come back interned, as from the lexer
+  strings = []
+  start = 0
+  for length in lengths:
+    strings.append(sys.intern(text[start:start + length]))
+    start += length
+
+  layouts = [(cls, slot_names(cls), len(slot_names(cls))) for cls in format_classes]
+  stack = []
+  nodes = []
+  push, add_node, new = stack.append, nodes.append, object.__new__
+  try:
+    for code in codes:
+      # Most frequent first: positions, names, nodes
+      tag = code & 15
+      if tag == CODE_INT:
+        push(code >> 4)
+      elif tag == CODE_STR:
+        push(strings[code >> 4])
+      elif tag == CODE_NODE:
+        cls, names, count = layouts[code >> 4]
+        node = new(cls)
+        values = stack[-count:]
+        del stack[-count:]
+        for name, value in zip(names, values):
+          if value is not unset:
+            setattr(node, name, value)
+        add_node(node)
+        push(node)
+      elif tag == CODE_NONE:
+        push(None)
+      elif tag == CODE_LIST:
+        count = code >> 4
+        items = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        push(items)
+      elif tag == CODE_DICT:
+        count = 2 * (code >> 4)
+        items = stack[len(stack) - count:]
+        del stack[len(stack) - count:]
+        push(dict(zip(items[::2], items[1::2])))
+      elif tag == CODE_REF:
+        push(nodes[code >> 4])
+      elif tag == CODE_UNSET:
+        push(unset)
+      elif tag == CODE_TRUE or tag == CODE_FALSE:
+        push(tag == CODE_TRUE)
+      elif tag == CODE_BIG_INT:
+        push(int(strings[code >> 4]))
+      elif tag == CODE_SOURCE:
+        push(SourceFile(strings[code >> 4]))
+      elif tag == CODE_TYPE:
+        push(type_named(strings[code >> 4]))
+      else:
+        raise FormatError(f"unknown code {code}")
+  except (IndexError, ValueError) as e:
+    raise FormatError(f"corrupt VSOP AST file: {e}")
+  if len(stack) != 1:
+    raise FormatError("corrupt VSOP AST file")
+  return stack[0]
@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# vsop_bench.py
+#
+# VSOP benchmarks
+#
+# USAGE:
+#   python3 vsop_bench.py <benchmark> [size]
+#
+# -----------------------------------------------------------------------------
+__author__  = "Adrien"
+__version__ = '1.0'
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+def source_chunk():
+  chunk = ""
+  for name in ("factorial", "linked_list"):
+    with open(f"tests/{name}.vsop") as file:
+      chunk += file.read() + "\n(* block\n   comment *)\n// line comment\n"
+  return chunk
+
+def generated_source(tokens):
+  # Repeats the test programs until the source holds about `tokens` tokens
+  from vsop_lexer import VsopRegexLexer
+  chunk = source_chunk()
+  chunk_tokens = len(VsopRegexLexer().tokenize(chunk)[0])
+  return chunk * (tokens // chunk_tokens + 1)
+
+def generated_lines(lines):
+  # Same, for a source of about `lines` lines
+  chunk = source_chunk()
+  return chunk * (lines // chunk.count("\n") + 1)
+
+def factorial_classes(classes):
+  # A program that checks: `classes` copies of the factorial class, in
+  # inheritance chains of 8, then Main
+  with open("tests/factorial.vsop") as file:
+    chunk = file.read()
+  return "\n".join(chunk.replace("class Main", f"class Fact{i}"
+    + (f" extends Fact{i - 1}" if i % 8 else "")) for i in range(classes)) + chunk
+
+def measure(build, repeat=3):
+  # Best wall time of `build`, then the memory held by one of its results
+  best = None
+  for _ in range(repeat):
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+    del result
+  gc.collect()
+  tracemalloc.start()
+  result = build()
+  memory = tracemalloc.get_traced_memory()[0]
+  tracemalloc.stop()
+  return best, memory
+
+def report(name, elapsed, memory, count):
+  print(f"{name:<24}{elapsed:8.3f} s{memory / 2**20:10.1f} MB"
+    f"{memory / count:8.1f} B/token")
+
+
+### BENCHMARKS
+def bench_tokens(size=1000000):
+  from vsop_lexer import VsopLexer, VsopRegexLexer, TokenBuffer
+  text = generated_source(size)
+  count = len(TokenBuffer(text))
+  print(f"{count} tokens, {len(text)} bytes")
+  for name, build in (
+    ("ply LexToken list", lambda: VsopLexer().tokenize(text)),
+    ("regex LexToken list", lambda: VsopRegexLexer().tokenize(text)),
+    ("TokenBuffer", lambda: TokenBuffer(text))):
+    elapsed, memory = measure(build)
+    report(name, elapsed, memory, count)
+
+def bench_relex(size=50000):
+  # One character edits in the middle of the file, against a full tokenize
+  from vsop_lexer import VsopLexer
+  text = generated_lines(size)
+  lexer = VsopLexer()
+  middle = text.index("\n", len(text) // 2) + 1
+  print(f"{text.count(chr(10))} lines, {len(lexer.tokenize(text)[0])} tokens")
+  elapsed, _ = measure(lambda: VsopLexer().tokenize(text), repeat=1)
+  print(f"{'full tokenize':<24}{elapsed * 1e3:10.3f} ms")
+  for name, edited in (
+    ("relex replace", text[:middle] + "y" + text[middle + 1:]),
+    ("relex insert", text[:middle] + "y" + text[middle:])):
+    tokens, errors = lexer.tokenize(text)
+    edit = (middle, middle + 1, middle + 1) if len(edited) == len(text) \
+      else (middle, middle, middle + 1)
+    start = time.perf_counter()
+    lexer.relex(tokens, text, edited, [edit], errors)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<24}{elapsed * 1e3:10.3f} ms")
+
+def bench_parse(size=100000):
+  # ply's LR driver against the descent parser on long operator chains and
+  # on nesting kept under the recursion limit. Both read the regex lexer and
+  # run without the collector, the lexing time is given apart.
+  from vsop_lexer import VsopRegexLexer
+  from vsop_parser import VsopParser, VsopDescentParser
+  depth = 150
+  bodies = {
+    "long + chain" : " + ".join(["x * 2"] * size),
+    "long mixed chain" : " and ".join(["a + b * c ^ d <= e.f(g, -h)"] * (size // 8)),
+    "long block" : "; ".join(["x <- x + 1"] * (size // 4)),
+    "nested parens" : "(" * depth + "x" + ")" * depth,
+    "nested if" : "if c then " * depth + "x" + " else y" * depth,
+    "nested calls" : "f(" * depth + "x" + ")" * depth,
+    "nested not" : "not " * depth + "x",
+    "pow chain" : " ^ ".join(["x"] * depth),
+  }
+  lexer = VsopRegexLexer()
+  steps = (("lex", lexer.tokenize),
+    ("ply", VsopParser(lexer=lexer).parse),
+    ("descent", VsopDescentParser(lexer=lexer).parse))
+  print(f"{'':<20}" + "".join(f"{name:>12}" for name, _ in steps)
+    + f"{'parse only':>12}")
+  for name, body in bodies.items():
+    text = "class Main { main() : int32 { " + body + " } }"
+    repeat = 3 if len(body) > 10000 else 200
+    times = []
+    gc.collect()
+    gc.disable()
+    for _, step in steps:
+      best = None
+      for _ in range(repeat):
+        start = time.perf_counter()
+        step(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+      times.append(best)
+    gc.enable()
+    lex, ply, descent = times
+    print(f"{name:<20}" + "".join(f"{elapsed * 1e3:9.3f} ms" for elapsed in times)
+      + f"{(ply - lex) / (descent - lex):11.2f}x")
+
+def bench_session(size=300):
+  # A one class edit in a file of `size` classes, full parse against a
+  # ParseSession that saw the previous version
+  from vsop_parser import VsopParser, ParseSession
+  with open("tests/linked_list.vsop") as file:
+    chunk = file.read()
+  classes = [chunk.replace("List", f"List{i}").replace("Nil", f"Nil{i}")
+    .replace("Cons", f"Cons{i}").replace("Main", f"Main{i}") for i in range(size)]
+  text = "\n".join(classes)
+  edited = "\n".join(classes[:size // 2] + ["\n" + classes[size // 2]]
+    + classes[size // 2 + 1:])
+  parser = VsopParser()
+  session = ParseSession(parser)
+  session.parse(text)
+  for name, parse in (("full parse", parser.parse), ("session", session.parse)):
+    start = time.perf_counter()
+    parse(edited)
+    print(f"{name:<24}{(time.perf_counter() - start) * 1e3:10.3f} ms")
+  print(f"{session.parsed} classes parsed, {session.reused} reused")
+
+def bench_ast(size=100000):
+  # Memory held by the tree of a program of about `size` nodes, as node
+  # objects and as an AstArena before and after its facades are decoded
+  from vsop_ast import walk
+  from vsop_lexer import VsopRegexLexer
+  from vsop_parser import VsopDescentParser
+  parser = VsopDescentParser(lexer=VsopRegexLexer())
+  flat_parser = VsopDescentParser(lexer=VsopRegexLexer(), flat=True)
+  chunk = source_chunk()
+  count = sum(1 for _ in walk(parser.parse(chunk)[0]))
+  text = chunk * (size // count + 1)
+  count = sum(1 for _ in walk(parser.parse(text)[0]))
+  print(f"{count} nodes, {len(text)} bytes")
+  def decoded():
+    program = flat_parser.parse(text)[0]
+    for _ in walk(program):
+      pass
+    return program
+  for name, build in (("node objects", lambda: parser.parse(text)[0]),
+    ("arena", lambda: flat_parser.parse(text)[0]),
+    ("arena, decoded", decoded)):
+    elapsed, memory = measure(build)
+    print(f"{name:<24}{elapsed:8.3f} s{memory / 2**20:10.1f} MB"
+      f"{memory / count:8.1f} B/node")
+
+def bench_print(size=100000):
+  # -parse output of a program of about `size` nodes, str() against
+  # write_tree, both into a discarding file
+  import io
+  from vsop_ast import walk, write_tree
+  from vsop_lexer import VsopRegexLexer
+  from vsop_parser import VsopDescentParser
+  parser = VsopDescentParser(lexer=VsopRegexLexer())
+  chunk = source_chunk()
+  text = chunk * (size // sum(1 for _ in walk(parser.parse(chunk)[0])) + 1)
+  program = parser.parse(text)[0]
+  out = open(os.devnull, "w")
+  print(f"{sum(1 for _ in walk(program))} nodes, {len(str(program))} bytes of output")
+  for name, write in (("str", lambda: out.write(str(program))),
+    ("write_tree", lambda: write_tree(program, out))):
+    elapsed, _ = measure(write)
+    tracemalloc.start()
+    write()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:<24}{elapsed:8.3f} s{peak / 2**20:10.1f} MB peak")
+  out.close()
+
+
+def bench_dump(size=100000):
+  # A checked program of about `size` nodes read back with load, against
+  # lexing, parsing and checking it again and against pickle
+  import io
+  import pickle
+  from vsop_ast import walk, dump, load
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  def checked():
+    return VsopSem().semantic_analysis(parser.parse(text)[0])[0]
+  text = factorial_classes(1)
+  text = factorial_classes(size // sum(1 for _ in walk(checked())))
+  program = checked()
+  print(f"{sum(1 for _ in walk(program))} nodes, {len(text)} bytes")
+  data = io.BytesIO()
+  dump(program, data)
+  data = data.getvalue()
+  pickled = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+  print(f"dump {len(data) / 2**20:.1f} MB, pickle {len(pickled) / 2**20:.1f} MB")
+  for name, build in (("lex, parse and check", checked),
+    ("load", lambda: load(io.BytesIO(data))),
+    ("pickle.loads", lambda: pickle.loads(pickled)),
+    ("dump", lambda: dump(program, io.BytesIO()))):
+    elapsed, _ = measure(build)
+    print(f"{name:<24}{elapsed:8.3f} s")
+
+
+def bench_positions(size=100000):
+  # Nodes and tokens only hold offsets: lexing and parsing a program of about
+  # `size` nodes with ply, then what a diagnostic costs, the line index of the
+  # whole text built once and one position looked up in it
+  import random
+  from vsop_ast import walk
+  from vsop_lexer import VsopLexer, SourceFile
+  from vsop_parser import VsopParser
+  parser = VsopParser()
+  chunk = source_chunk()
+  text = chunk * (size // sum(1 for _ in walk(parser.parse(chunk)[0])) + 1)
+  count = sum(1 for _ in walk(parser.parse(text)[0]))
+  print(f"{count} nodes, {text.count(chr(10))} lines, {len(text)} bytes")
+  for name, build in (("ply tokenize", lambda: VsopLexer().tokenize(text)),
+    ("ply parse", lambda: parser.parse(text)[0])):
+    elapsed, memory = measure(build)
+    print(f"{name:<24}{elapsed:8.3f} s{memory / 2**20:10.1f} MB")
+  elapsed, memory = measure(lambda: SourceFile(text).index())
+  print(f"{'line index':<24}{elapsed * 1e3:8.3f} ms{memory / 2**20:8.1f} MB")
+  source = SourceFile(text)
+  offsets = [random.randrange(len(text)) for _ in range(100000)]
+  source.position(0)
+  start = time.perf_counter()
+  for offset in offsets:
+    source.position(offset)
+  elapsed = (time.perf_counter() - start) / len(offsets)
+  print(f"{'position':<24}{elapsed * 1e9:8.1f} ns")
+
+def bench_intern(size=100000):
+  # The names of a parsed program of about `size` nodes as the lexer interns
+  # them, against one fresh string per occurrence as before: memory held by
+  # the strings of the tree and time of VsopSem on it
+  from vsop_ast import walk, slot_names
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  text = factorial_classes(1)
+  text = factorial_classes(size // sum(1 for _ in walk(parser.parse(text)[0])))
+  def copied(program):
+    for node in walk(program):
+      for name in slot_names(type(node)):
+        value = getattr(node, name, None)
+        if type(value) is str and len(value) > 1:
+          setattr(node, name, (value + " ")[:-1])
+    return program
+  def strings(program):
+    found = {id(value) : value for node in walk(program)
+      for value in (getattr(node, name, None) for name in slot_names(type(node)))
+      if type(value) is str}
+    return len(found), sum(sys.getsizeof(value) for value in found.values())
+  print(f"{sum(1 for _ in walk(parser.parse(text)[0]))} nodes, {len(text)} bytes")
+  for name, build in (("fresh strings", lambda: copied(parser.parse(text)[0])),
+    ("interned", lambda: parser.parse(text)[0])):
+    count, memory = strings(build())
+    best = None
+    for _ in range(3):
+      program = build()
+      gc.collect()
+      start = time.perf_counter()
+      VsopSem().semantic_analysis(program)
+      elapsed = time.perf_counter() - start
+      best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<24}{count:8} strings{memory / 2**20:8.2f} MB  check{best:8.3f} s")
+
+def bench_dispatch(size=1000000):
+  # Cost of reaching the code of each expression kind, through the chain of
+  # isinstance tests VsopSem had, through Visitor.visit and through the
+  # dispatch table as VsopSem uses it
+  from vsop_ast import (Visitor, Literal, Object_identifier, BinOp, UnOp, New,
+    Assign, Call, Block, While, If, Let)
+  kinds = (Literal, Object_identifier, BinOp, UnOp, New, Assign, Call, Block,
+    While, If, Let)
+  def chain(node):
+    if isinstance(node, Literal):
+      return 0
+    if isinstance(node, Object_identifier):
+      return 1
+    if isinstance(node, BinOp):
+      return 2
+    if isinstance(node, UnOp):
+      return 3
+    if isinstance(node, New):
+      return 4
+    if isinstance(node, Assign):
+      return 5
+    if isinstance(node, Call):
+      return 6
+    if isinstance(node, Block):
+      return 7
+    if isinstance(node, While):
+      return 8
+    if isinstance(node, If):
+      return 9
+    if isinstance(node, Let):
+      return 10
+  class Kinds(Visitor):
+    pass
+  for i, cls in enumerate(kinds):
+    setattr(Kinds, 'visit_' + cls.__name__, lambda self, node, i=i: i)
+  kinds_visitor = Kinds()
+  table = Kinds.dispatch
+  def direct(node):
+    return table[type(node)](kinds_visitor, node)
+  print(f"{'':<20}{'isinstance':>12}{'visit()':>12}{'table':>12}")
+  for cls in kinds:
+    nodes = [cls.__new__(cls)] * (size // len(kinds))
+    times = []
+    for dispatch in (chain, kinds_visitor.visit, direct):
+      best = None
+      for _ in range(3):
+        start = time.perf_counter()
+        for node in nodes:
+          dispatch(node)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+      times.append(best / len(nodes))
+    print(f"{cls.__name__:<20}" + "".join(f"{t * 1e9:9.1f} ns" for t in times))
+
+def bench_lets(size=1000):
+  # VsopSem on a method of `size` nested lets, each initialised from the one
+  # before, then on half and a quarter of it: time and peak memory of the
+  # check should grow linearly with the depth
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  for depth in (size // 4, size // 2, size):
+    body = "".join(f"let v{i} : int32 <- v{i - 1} + 1 in " for i in range(1, depth))
+    text = ("class Main { main() : int32 { let v0 : int32 <- 0 in "
+      + body + f"v{depth - 1} }} }}")
+    best = None
+    for _ in range(3):
+      program = parser.parse(text)[0]
+      gc.collect()
+      start = time.perf_counter()
+      VsopSem().semantic_analysis(program)
+      elapsed = time.perf_counter() - start
+      best = elapsed if best is None else min(best, elapsed)
+    program = parser.parse(text)[0]
+    gc.collect()
+    tracemalloc.start()
+    VsopSem().semantic_analysis(program)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{depth:>8} lets{best:8.3f} s{peak / 2**20:10.2f} MB peak")
+
+def bench_chain(size=10000):
+  # VsopSem on a linear inheritance chain of `size` classes, then of half
+  # and a quarter of it, each class adding a field and a method and
+  # redefining one: time and peak memory of the check
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  for depth in (size // 4, size // 2, size):
+    text = "class C0 { f0 : int32; m(x : int32) : int32 { x } }\n" + "".join(
+      f"class C{i} extends C{i - 1} {{ f{i} : int32 <- {i}; "
+      f"m(x : int32) : int32 {{ x + f{i} }} g{i}() : C0 {{ new C{i} }} }}\n"
+      for i in range(1, depth)) + (f"class Main {{ c : C{depth - 1} <- new C{depth - 1}; "
+      f"main() : int32 {{ c.m(1) }} }}")
+    best = None
+    for _ in range(3):
+      program = parser.parse(text)[0]
+      gc.collect()
+      start = time.perf_counter()
+      VsopSem().semantic_analysis(program)
+      elapsed = time.perf_counter() - start
+      best = elapsed if best is None else min(best, elapsed)
+    program = parser.parse(text)[0]
+    gc.collect()
+    tracemalloc.start()
+    VsopSem().semantic_analysis(program)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{depth:>8} classes{best:8.3f} s{peak / 2**20:10.2f} MB peak")
+
+def bench_types(size=100000):
+  # VsopSem on a program of about `size` nodes: time, peak of the memory
+  # allocated during the check and memory the check leaves on the tree
+  from vsop_ast import walk
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  text = factorial_classes(1)
+  text = factorial_classes(size // sum(1 for _ in walk(parser.parse(text)[0])))
+  best = None
+  for _ in range(3):
+    program = parser.parse(text)[0]
+    gc.collect()
+    start = time.perf_counter()
+    VsopSem().semantic_analysis(program)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+  program = parser.parse(text)[0]
+  print(f"{sum(1 for _ in walk(program))} nodes")
+  gc.collect()
+  tracemalloc.start()
+  VsopSem().semantic_analysis(program)
+  kept, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print(f"{'check':<24}{best:8.3f} s{peak / 2**20:10.2f} MB peak{kept / 2**20:10.2f} MB kept")
+
+def bench_jobs(size=2000):
+  # VsopSem on `size` factorial classes, with the 4th pass serial then in
+  # 2, 4 and 8 worker processes. On one cpu the workers only add their
+  # start and the static types sent back: 0.11 s serial, 0.34 s in 2
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  text = factorial_classes(size)
+  print(f"{size} classes, {os.cpu_count()} cpus")
+  for jobs in (1, 2, 4, 8):
+    best = None
+    for _ in range(3):
+      program = parser.parse(text)[0]
+      gc.collect()
+      start = time.perf_counter()
+      VsopSem(jobs).semantic_analysis(program)
+      elapsed = time.perf_counter() - start
+      best = elapsed if best is None else min(best, elapsed)
+    print(f"{jobs:>4} jobs{best:8.3f} s")
+
+def bench_semsession(size=1000):
+  # Check of `size` factorial classes after an edit of the body of one of
+  # them, then after one adding a method to it: full check against a
+  # SemSession that checked the program before the edit
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem, SemSession
+  parser = VsopParser()
+  text = factorial_classes(size)
+  at = text.index(f"class Fact{size // 2 - 4} ")
+  edits = (("body edit", text[:at] + text[at:].replace("if n < 2", "if n < 3\n", 1)),
+    ("signature edit", text[:at] + text[at:].replace("main()",
+      "twice(n : int32) : int32 { n + n }\n  main()", 1)))
+  session = SemSession()
+  def timed(check, before, edited):
+    best = None
+    for _ in range(3):
+      if before is not None:
+        session.check(parser.parse(before)[0])
+      program = parser.parse(edited)[0]
+      gc.collect()
+      start = time.perf_counter()
+      check(program)
+      elapsed = time.perf_counter() - start
+      best = elapsed if best is None else min(best, elapsed)
+    return best
+  print(f"{size} classes")
+  for name, edited in edits:
+    full = timed(lambda program: VsopSem().semantic_analysis(program), None, edited)
+    incremental = timed(session.check, text, edited)
+    print(f"{name:<16}{full * 1e3:9.3f} ms full{incremental * 1e3:9.3f} ms session"
+      f"{incremental / full:8.1%}{session.checked:6} checked{session.reused:6} reused")
+
+
+def bench_inheritance(size=20000):
+  # The 2nd pass and the hierarchy index on a chain of `size` classes,
+  # listed from the top and from the bottom
+  from vsop_ast import Program
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem, ClassHierarchy
+  parser = VsopParser()
+  classes = ["class C0 { }\n"] + [f"class C{i} extends C{i - 1} {{ }}\n" for i in range(1, size)]
+  main = "class Main { main() : int32 { 0 } }"
+  for name, text in (("top first", "".join(classes) + main),
+    ("bottom first", "".join(reversed(classes)) + main)):
+    program = parser.parse(text)[0]
+    best = None
+    for _ in range(3):
+      sem = VsopSem()
+      sem.begin(program.source)
+      sem.program = Program(list(program.list_class), program.source)
+      for cl in sem.program.list_class:
+        sem.check_class(cl)
+      sem.check_redefine_and_main()
+      gc.collect()
+      start = time.perf_counter()
+      sem.check_inheritance()
+      middle = time.perf_counter()
+      ClassHierarchy(sem.program.list_class, sem.order)
+      times = (middle - start, time.perf_counter() - middle)
+      best = times if best is None else tuple(map(min, best, times))
+    print(f"{name:<16}{size:>8} classes{best[0] * 1e3:10.3f} ms pass 2"
+      f"{best[1] * 1e3:10.3f} ms hierarchy")
+
+def bench_deep(size=100000):
+  # VsopSem on expressions nested `size` deep, then half and a quarter of
+  # it: a + chain, ifs, lets and a . dispatch chain. The check keeps no
+  # Python recursion per level, it runs under the default recursion limit
+  # and its time should grow linearly. The LALR parser has its own stacks
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  parser = VsopParser()
+  shapes = (
+    ("+ chain", lambda depth: "a" + " + a" * depth),
+    ("ifs", lambda depth: "if true then " * depth + "a" + " else a" * depth),
+    ("lets", lambda depth: "let b : int32 <- a in " * depth + "b"),
+    ("dispatch chain", lambda depth: "{ (new Main)" + ".me()" * depth + "; a }"))
+  print(f"recursion limit {sys.getrecursionlimit()}")
+  for name, body in shapes:
+    for depth in (size // 4, size // 2, size):
+      text = (f"class Main {{ me() : Main {{ new Main }} f(a : int32) : int32 {{ {body(depth)} }} "
+        f"main() : int32 {{ 0 }} }}")
+      best = None
+      for _ in range(3):
+        program = parser.parse(text)[0]
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        errors = VsopSem().semantic_analysis(program)[1]
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        assert not errors
+        best = elapsed if best is None else min(best, elapsed)
+      print(f"{name:<16}{depth:>8} deep{best:8.3f} s{best / depth * 1e6:8.2f} us/level")
+
+
+benchmarks = {
+  'tokens' : bench_tokens,
+  'relex' : bench_relex,
+  'parse' : bench_parse,
+  'session' : bench_session,
+  'ast' : bench_ast,
+  'print' : bench_print,
+  'dump' : bench_dump,
+  'positions' : bench_positions,
+  'intern' : bench_intern,
+  'dispatch' : bench_dispatch,
+  'lets' : bench_lets,
+  'deep' : bench_deep,
+  'chain' : bench_chain,
+  'inheritance' : bench_inheritance,
+  'types' : bench_types,
+  'jobs' : bench_jobs,
+  'semsession' : bench_semsession,
+}
+
+### MAIN
+if __name__ == "__main__":
+  if len(sys.argv) < 2 or sys.argv[1] not in benchmarks:
+    print("vsop_bench.py " + " | ".join(benchmarks) + " [size]")
+    exit(1)
+  if len(sys.argv) > 2:
+    benchmarks[sys.argv[1]](int(sys.argv[2]))
+  else:
+    benchmarks[sys.argv[1]]()
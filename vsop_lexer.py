@@ -21,8 +21,55 @@
 __author__  = "Adrien"
 __version__ = '3.0'
 
+import gc
+import mmap
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, islice
+from operator import attrgetter
 import ply.lex as lex
-from ply.lex import TOKEN
+from ply.lex import TOKEN, LexToken
+
+def escape_byte(char):
+  # Non printable characters are written as \xhh, one escape per utf-8 byte
+  if isinstance(char, str):
+    char = char.encode("utf-8")
+  return "".join(f"\\x{b:02x}" for b in char)
+
+### SOURCE FILES
+# Tokens and nodes only keep the offset where they start in their text. The
+# line and column of an offset are looked up here when a diagnostic needs
+# them, by bisection in the start offsets of the lines, which are only
+# computed the first time, in one pass over the whole text.
+class SourceFile():
+  __slots__ = ('text', 'line_starts')
+
+  def __init__(self, text):
+    self.text = text
+    self.line_starts = None
+
+  def index(self):
+    # Line i + 1 starts after the i-th line feed
+    lengths = map(len, self.text.split("\n"))
+    self.line_starts = list(accumulate(map((1).__add__, lengths), initial=0))
+    del self.line_starts[-1]
+    return self.line_starts
+
+  def position(self, offset):
+    # (line, column) from 1, (None, None) for no offset
+    if offset is None:
+      return None, None
+    starts = self.line_starts or self.index()
+    line = bisect_right(starts, offset)
+    return line, offset - starts[line - 1] + 1
+
+  def offset(self, line, column):
+    starts = self.line_starts or self.index()
+    return starts[line - 1] + column - 1
+
 
 class LexicalError():
   def __init__(self, line, column, description):
@@ -33,6 +80,22 @@ class LexicalError():
   def __str__(self):
     return f"{self.line}:{self.column}: lexical error: {self.description}"
 
+# Identifiers, keywords and type names go through the symbol table of their
+# lexer, kept for every text it reads: all occurrences of a name are then one
+# string object, that the tree and VsopSem compare and hash by identity
+# first. The table maps a name to (name, token type), which also replaces the
+# keyword lookup. It starts with the names VsopSem compares against, which
+# are the very constants of its code.
+def new_symbols():
+  symbols = {name : (name, kind) for name, kind in VsopLexer.keywords.items()}
+  for name in map(sys.intern, ("Object", "Main", "main", "self")):
+    symbols[name] = (name, 'type_identifier' if name[0].isupper() else 'object_identifier')
+  return symbols
+
+def add_symbol(symbols, name, kind):
+  symbol = symbols[name] = (name, kind)
+  return symbol
+
 class VsopLexer():
   states = (
     ('comment','exclusive'),
@@ -127,46 +190,100 @@ class VsopLexer():
   alphanum    = r'[a-zA-Z0-9]'
 
 
+  # Tokens only get their lexpos: lines are not counted (ply's lineno of
+  # every token stays 1), errors take their position from self.source.
   def __init__(self):
     self.errors = []
-    self.line_lexpos_array = [-1]
+    self.symbols = new_symbols()
+    self.source = SourceFile("")
     self.comment_level = []
-    self.string = ''
+    self.string = []
     self.last_lexpos = 0
-    self.last_lineno = 0
-    self.last_column = 0
     self.lexer = lex.lex(module=self)
   
   def input(self, text):
+    # Everything is reset, one lexer can be used for several texts
+    self.errors = []
+    self.source = SourceFile(text)
+    self.comment_level = []
+    self.string = []
+    self.last_lexpos = 0
     self.lexer.input(text)
+    self.lexer.begin('INITIAL')
 
   def token(self):
-    while True:
-      t = self.lexer.token()
-      break
-    if t and not hasattr(t, 'column'):
-        t.column = self.find_column(t)
-    return t
+    return self.lexer.token()
+
+  def error(self, lexpos, description):
+    self.errors.append(LexicalError(*self.source.position(lexpos), description))
 
   def tokenize(self, text):
-    self.errors = []
-    self.line_lexpos_array = [-1]
-    self.comment_level = []
-    self.string = ''
-    self.last_lexpos = 0
-    self.last_lineno = 0
-    self.last_column = 0
-    
     tokens = []
-    self.lexer.input(text)
+    self.input(text)
     while True:
       tok = self.token()
       if not tok: break
       tokens.append(tok)
     return tokens, self.errors
 
-  def find_column(self, token):
-    return token.lexpos - self.line_lexpos_array[token.lineno-1]
+  def relex(self, previous_tokens, old_text, new_text, edits,
+      previous_errors=None):
+    # Updates the tokenize() result of old_text for new_text, edits are the
+    # (start, old_end, new_end) offsets of the changed ranges. Scanning
+    # restarts on the last token starting before the edits (always in the
+    # INITIAL state) and stops as soon as a new token starts past the edits
+    # where an old one started: the texts are the same from there, so the
+    # old tokens are only moved. previous_tokens is updated in place.
+    if previous_errors is None:
+      previous_errors = self.errors
+    if not edits:
+      return previous_tokens, previous_errors
+    start = min(edit[0] for edit in edits)
+    old_end = max(edit[1] for edit in edits)
+    delta = len(new_text) - len(old_text)
+    new_end = old_end + delta
+
+    old = bisect_left(previous_tokens, start, key=attrgetter('lexpos'))
+    restart = max(old - 1, 0)
+    lexpos = previous_tokens[restart].lexpos if restart else 0
+    # Errors only have a position, their offsets come back from old_text
+    old_source = SourceFile(old_text)
+    errors = [e for e in previous_errors
+      if old_source.offset(e.line, e.column) < lexpos]
+
+    self.input(new_text)
+    self.lexer.lexpos = lexpos
+
+    tokens = []
+    while True:
+      tok = self.token()
+      if not tok:
+        previous_tokens[restart:] = tokens
+        self.errors = errors + self.errors
+        return previous_tokens, self.errors
+      if tok.lexpos >= new_end:
+        target = tok.lexpos - delta
+        while old < len(previous_tokens) and previous_tokens[old].lexpos < target:
+          old += 1
+        if old < len(previous_tokens) and previous_tokens[old].lexpos == target:
+          break
+      tokens.append(tok)
+
+    # Back in sync, the old tail only moves
+    sync = previous_tokens[old]
+    source = self.source
+    errors += [e for e in self.errors if source.offset(e.line, e.column) < tok.lexpos]
+    for e in previous_errors:
+      offset = old_source.offset(e.line, e.column)
+      if offset >= sync.lexpos:
+        errors.append(LexicalError(*source.position(offset + delta), e.description))
+    self.errors = errors
+
+    previous_tokens[restart:old] = tokens
+    if delta:
+      for t in islice(previous_tokens, restart + len(tokens), None):
+        t.lexpos += delta
+    return previous_tokens, errors
     
   #Regular expression function rules tokens
   #WARNING All tokens defined by functions are added in the same order as
@@ -175,12 +292,14 @@ class VsopLexer():
 
   @TOKEN(uppercase + r'(' + letter + r'|' + digit + r'| _ )*')
   def t_type_identifier(self, t):
-    t.type = 'type_identifier'
+    t.value, t.type = self.symbols.get(t.value) or \
+      add_symbol(self.symbols, t.value, 'type_identifier')
     return t
 
   @TOKEN(lowercase + r'(' + letter + r'|' + digit + r'| _ )*')
   def t_object_identifier(self, t):
-    t.type = self.keywords.get(t.value,'object_identifier')
+    t.value, t.type = self.symbols.get(t.value) or \
+      add_symbol(self.symbols, t.value, 'object_identifier')
     return t
 
 
@@ -191,15 +310,12 @@ class VsopLexer():
 
   @TOKEN(r'\(\*')
   def t_open_comment(self, t):
-    self.comment_level = [(t.lineno,  self.find_column(t), t.lexpos)]
-    # self.last_lexpos = t.lexpos
-    # self.last_lineno = t.lineno
-    # self.last_column = self.find_column(t)
+    self.comment_level = [t.lexpos]
     t.lexer.begin('comment')
 
   @TOKEN(r'\(\*')
   def t_comment_open_nested(self, t):
-    self.comment_level.append((t.lineno,  self.find_column(t), t.lexpos))
+    self.comment_level.append(t.lexpos)
 
   @TOKEN(r'\*\)')
   def t_comment_close(self, t):
@@ -208,62 +324,55 @@ class VsopLexer():
     else:
       t.lexer.begin('INITIAL')
 
-  @TOKEN(r'.')
+  # Whole runs of characters that can not start a delimiter at once
+  @TOKEN(r'[^(*]+|.')
   def t_comment_any(self, t):
     pass
 
   @TOKEN(r'\*\)')
   def t_close_comment_error(self, t):
-    self.errors.append(LexicalError(t.lineno, self.find_column(t),
-      "Comment not closed"))
+    self.error(t.lexpos, "Comment not closed")
 
 
 ### STRINGS
   @TOKEN(r'"')
   def t_open_string(self, t):
-    self.string = '"'
+    self.string = ['"']
     self.last_lexpos = t.lexpos
-    self.last_lineno = t.lineno
-    self.last_column = self.find_column(t)
     t.lexer.begin('string')
 
   @TOKEN(r'"')
   def t_string_close(self, t):
     t.type = 'string_literal'
-    self.string += '"'
-    t.value = self.string
+    self.string.append('"')
+    t.value = "".join(self.string)
     t.lexpos = self.last_lexpos
-    t.lineno = self.last_lineno
-    t.column = self.last_column
     t.lexer.begin('INITIAL')
     return t
 
   @TOKEN(r'\\[btnr\\"]')
   def t_string_escape_char(self, t):
-    self.string += self.escape_char[t.value[1]]
+    self.string.append(self.escape_char[t.value[1]])
 
   @TOKEN(r'\\\n\ *')
   def t_string_break(self, t):
-
-    self.line_lexpos_array.append(t.lexpos + 1)
-    t.lexer.lineno += 1
+    pass
 
   @TOKEN(r'\\x' + hex_digit + hex_digit)
   def t_string_hex(self, t):
-    self.string += t.value
+    self.string.append(t.value)
 
-  @TOKEN(r'.')
+  # Whole runs of printable characters at once, others one by one
+  @TOKEN(r'[ !\#-\[\]-~]+|.')
   def t_string_any(self, t):
     if t.value == '\\':
-      self.errors.append(LexicalError(t.lineno, self.find_column(t),
-        "Invalid character in string literal"))
+      self.error(t.lexpos, "Invalid character in string literal")
     elif t.value == '\0':
-      self.errors.append(LexicalError(t.lineno, self.find_column(t),
-        "Invalid character in string literal"))
-    elif ord(t.value) < 32 or ord(t.value) > 126:
-      self.string += "\\x" + t.value.encode("hex")
+      self.error(t.lexpos, "Invalid character in string literal")
+    elif len(t.value) == 1 and (ord(t.value) < 32 or ord(t.value) > 126):
+      self.string.append(escape_byte(t.value))
     else:
-      self.string += t.value
+      self.string.append(t.value)
 
 
 ### INTEGER
@@ -274,8 +383,7 @@ class VsopLexer():
       t.value = int(t.value[2:], 16)
       return t
     except ValueError:
-      self.errors.append(LexicalError(t.lineno, self.find_column(t),
-        "Invalid integer literal"))
+      self.error(t.lexpos, "Invalid integer literal")
 
   @TOKEN(alphanum + r'+')
   def t_integer_literal(self, t):
@@ -284,29 +392,14 @@ class VsopLexer():
       t.value = int(t.value)
       return t
     except ValueError:
-      self.errors.append(LexicalError(t.lineno, self.find_column(t),
-          "Invalid integer literal"))  
+      self.error(t.lexpos, "Invalid integer literal")
 
 
 ### LINE FEED
-  def t_newline(self, t):
-    r'\n'
-    self.line_lexpos_array.append(t.lexpos)
-    t.lexer.lineno += 1
-
+  # Outside of strings line feeds are ignored characters
   def t_string_newline(self, t):
     r'\n'
-    line = t.lexer.lineno
-    column = self.find_column(t)
-    self.line_lexpos_array.append(t.lexpos)
-    t.lexer.lineno += 1
-    self.errors.append(LexicalError(line, column,
-      "Invalid raw line feed in string literal"))
-
-  def t_comment_newline(self, t):
-    r'\n'
-    self.line_lexpos_array.append(t.lexpos)
-    t.lexer.lineno += 1
+    self.error(t.lexpos, "Invalid raw line feed in string literal")
 
 
 ### EOF
@@ -314,18 +407,16 @@ class VsopLexer():
     return None
 
   def t_string_eof(self, t):
-    self.errors.append(LexicalError(self.last_lineno, self.last_column,
-      "EOF reached in string literal"))
+    self.error(self.last_lexpos, "EOF reached in string literal")
     return None
 
   def t_comment_eof(self, t):
-    self.errors.append(LexicalError(self.comment_level[-1][0], self.comment_level[-1][1],
-      "EOF reached in comment"))
+    self.error(self.comment_level[-1], "EOF reached in comment")
     return None
 
 
 ### IGNORED CHARS
-  t_ignore  = ' \t\r\f'
+  t_ignore  = ' \t\r\f\n'
   t_comment_ignore = ''
   t_string_ignore = ''
 
@@ -333,7 +424,7 @@ class VsopLexer():
 ### ERROR RULES
   def t_error(self, t):
     t.lexer.skip(1)
-    self.errors.append(LexicalError(t.lineno, self.find_column(t), "Invalid character"))
+    self.error(t.lexpos, "Invalid character")
 
   def t_comment_error(self, t):
     return self.t_error(t)
@@ -342,6 +433,406 @@ class VsopLexer():
     return self.t_error(t)
 
 
+### REGEX BACKEND
+# Same tokenize(text) -> (tokens, errors) contract as VsopLexer, but every
+# state is scanned with regexes compiled once per process instead of one ply
+# callback per token (or per character inside comments and strings).
+# The scanner runs either on a str or on the bytes of a memory mapped file,
+# in which case line breaks follow the universal newlines of open(path, 'r').
+
+def compile_scanner(newline, line_char, ignore, char, encode=None):
+  pattern = {
+    'initial' : r"""
+      [%(ignore)s]*
+      (?:
+        (?P<object_identifier>[a-z][a-zA-Z0-9_]*)
+      | (?P<single_line_comment>//%(line_char)s*)
+      | (?P<open_comment>\(\*)
+      | (?P<close_comment_error>\*\))
+      | (?P<operator><=|<-|[{}():;,+\-*/^.=<])
+      | (?P<newline>%(newline)s)
+      | (?P<type_identifier>[A-Z][a-zA-Z0-9_]*)
+      | (?P<string_literal>"[ !\#-\[\]-~]*")
+      | (?P<open_string>")
+      | (?P<integer_literal>0x[a-zA-Z0-9]*|[0-9][a-zA-Z0-9]*)
+      | (?P<error>(?![%(ignore)s])%(char)s)
+      )""",
+    'comment' : r"""
+        (?P<open>\(\*)
+      | (?P<close>\*\))
+      | (?P<newline>%(newline)s)""",
+    'string' : r"""
+        (?P<chars>[ !\#-\[\]-~]+)
+      | (?P<close>")
+      | (?P<escape_char>\\[btnr\\"])
+      | (?P<string_break>\\(?P<break_newline>%(newline)s)[ ]*)
+      | (?P<hex>\\x[0-9A-Fa-f][0-9A-Fa-f])
+      | (?P<newline>%(newline)s)
+      | (?P<invalid>[\\\0])
+      | (?P<other>%(char)s)"""
+  }
+  scanner = {}
+  for state, regex in pattern.items():
+    regex = regex % {'newline' : newline, 'line_char' : line_char,
+      'ignore' : ignore, 'char' : char}
+    if encode:
+      regex = regex.encode(encode)
+    scanner[state] = re.compile(regex, re.VERBOSE | re.DOTALL)
+  return scanner
+
+# In bytes a whole utf-8 sequence is a single character (and column)
+text_scanner = compile_scanner(r"\n", r"[^\n]", r" \t\r\f", r".")
+bytes_scanner = compile_scanner(r"\r\n|\r|\n", r"[^\r\n]", r" \t\f",
+  r"(?:[\xc0-\xff][\x80-\xbf]*|.)", encode="latin-1")
+
+operator_type = {
+  '<=' : 'lower_equal',
+  '<-' : 'assign',
+  '{' : 'lbrace',
+  '}' : 'rbrace',
+  '(' : 'lpar',
+  ')' : 'rpar',
+  ':' : 'colon',
+  ';' : 'semicolon',
+  ',' : 'comma',
+  '+' : 'plus',
+  '-' : 'minus',
+  '*' : 'times',
+  '/' : 'div',
+  '^' : 'pow',
+  '.' : 'dot',
+  '=' : 'equal',
+  '<' : 'lower'
+}
+
+class VsopRegexLexer():
+  tokens = VsopLexer.tokens
+  keywords = VsopLexer.keywords
+  escape_char = VsopLexer.escape_char
+
+  def __init__(self):
+    self.errors = []
+    self.symbols = new_symbols()
+    self.source = SourceFile("")
+    self.tokens_iter = iter(())
+
+  def input(self, text):
+    self.errors = []
+    self.source = SourceFile(text)
+    self.tokens_iter = self.scan(text, text_scanner, str)
+
+  def token(self):
+    return next(self.tokens_iter, None)
+
+  def tokenize(self, text):
+    self.input(text)
+    # Tokens never form reference cycles, collecting while allocating
+    # millions of them only costs time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+      tokens = list(self.tokens_iter)
+    finally:
+      if gc_enabled:
+        gc.enable()
+    return tokens, self.errors
+
+  def iter_tokens(self, path):
+    # Tokens are produced while the file is read, nothing grows with the
+    # file size: lines are counted as they go and lexpos are byte offsets
+    self.errors = []
+    return self.scan_file(path)
+
+  def scan_file(self, path):
+    with open(path, 'rb') as file:
+      if not os.fstat(file.fileno()).st_size:
+        return
+      with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        yield from self.scan(data, bytes_scanner, bytes.decode)
+
+  def scan(self, text, scanner, str_of):
+    # Tokens also get their line and column, that the streaming -lex output
+    # prints without ever holding the text
+    symbols = self.symbols
+    symbol = symbols.get
+    for kind, start, end, lineno, column, value in self.scan_spans(text, scanner, str_of):
+      tok = LexToken()
+      if kind == 'object_identifier':
+        value = str_of(text[start:end])
+        value, kind = symbol(value) or add_symbol(symbols, value, kind)
+      elif kind == 'operator':
+        value = str_of(text[start:end])
+        kind = operator_type[value]
+      elif value is None:
+        value = str_of(text[start:end])
+        if kind == 'type_identifier':
+          value = (symbol(value) or add_symbol(symbols, value, kind))[0]
+      tok.type = kind
+      tok.value = value
+      tok.lexpos = start
+      tok.lineno = lineno
+      tok.column = column
+      yield tok
+
+  def scan_spans(self, text, scanner, str_of):
+    # The scanning shared by scan() and TokenBuffer: (kind, start, end,
+    # line, column, value) of each token. value is only given when it is
+    # not the source text: the int of an integer literal and the value of
+    # a string literal read escape by escape, else it is None.
+    # object_identifier covers the keywords, operator every operator.
+    errors = self.errors
+    finditer = scanner['initial'].finditer
+    lineno = 1
+    # Non ascii characters move line_start forward so that columns keep
+    # counting characters: column = start - line_start + 1
+    line_start = 0
+    pos = 0
+
+    while True:
+      # Comments and strings needing escapes leave the finditer loop, which
+      # is then restarted right after them
+      for m in finditer(text, pos):
+        kind = m.lastgroup
+
+        if kind == 'object_identifier' or kind == 'operator' \
+            or kind == 'type_identifier' or kind == 'string_literal':
+          start, end = m.span(kind)
+          yield kind, start, end, lineno, start - line_start + 1, None
+
+        elif kind == 'newline':
+          line_start = m.end(kind)
+          lineno += 1
+
+        elif kind == 'integer_literal':
+          start, end = m.span(kind)
+          value = str_of(text[start:end])
+          try:
+            if value.startswith('0x'):
+              value = int(value[2:], 16)
+            else:
+              value = int(value)
+          except ValueError:
+            errors.append(LexicalError(lineno, start - line_start + 1,
+              "Invalid integer literal"))
+            continue
+          yield kind, start, end, lineno, start - line_start + 1, value
+
+        elif kind == 'single_line_comment':
+          pass
+
+        elif kind == 'open_string':
+          start, pos = m.span(kind)
+          line, column = lineno, start - line_start + 1
+          pos, lineno, line_start, value = self.scan_string(text,
+            scanner['string'], str_of, pos, lineno, line_start, line, column)
+          if value is None:
+            return
+          yield 'string_literal', start, pos, line, column, value
+          break
+
+        elif kind == 'open_comment':
+          start, pos = m.span(kind)
+          pos, lineno, line_start = self.scan_comment(text,
+            scanner['comment'], str_of, pos, lineno, line_start, start)
+          if pos is None:
+            return
+          break
+
+        elif kind == 'close_comment_error':
+          errors.append(LexicalError(lineno, m.start(kind) - line_start + 1,
+            "Comment not closed"))
+
+        else:
+          start, end = m.span(kind)
+          errors.append(LexicalError(lineno, start - line_start + 1,
+            "Invalid character"))
+          line_start += end - start - 1
+      else:
+        return
+
+  def scan_comment(self, text, comment_re, str_of, pos, lineno, line_start,
+    start):
+    # Returns the state after the matching "*)", pos is None on EOF
+    comment_level = [(lineno, start - line_start + 1)]
+    search = comment_re.search
+    while True:
+      m = search(text, pos)
+      if not m:
+        self.errors.append(LexicalError(comment_level[-1][0],
+          comment_level[-1][1], "EOF reached in comment"))
+        return None, lineno, line_start
+      kind = m.lastgroup
+      start, end = m.span()
+      if str_of is not str:
+        skipped = text[pos:start]
+        if not skipped.isascii():
+          line_start += len(skipped) - len(str_of(skipped, 'utf-8', 'replace'))
+      pos = end
+      if kind == 'newline':
+        lineno += 1
+        line_start = pos
+      elif kind == 'open':
+        comment_level.append((lineno, start - line_start + 1))
+      elif len(comment_level) > 1:
+        del comment_level[-1]
+      else:
+        return pos, lineno, line_start
+
+  def scan_string(self, text, string_re, str_of, pos, lineno, line_start,
+    line, column):
+    # Returns the state after the closing quote and the literal value,
+    # the value is None on EOF. line and column are those of the quote
+    parts = ['"']
+    match = string_re.match
+    while True:
+      m = match(text, pos)
+      if not m:
+        self.errors.append(LexicalError(line, column,
+          "EOF reached in string literal"))
+        return pos, lineno, line_start, None
+      kind = m.lastgroup
+      start, pos = m.span()
+      if kind == 'chars' or kind == 'hex':
+        parts.append(str_of(m.group()))
+      elif kind == 'close':
+        parts.append('"')
+        return pos, lineno, line_start, "".join(parts)
+      elif kind == 'escape_char':
+        parts.append(self.escape_char[str_of(m.group())[1]])
+      elif kind == 'string_break':
+        lineno += 1
+        line_start = m.end('break_newline')
+      elif kind == 'newline':
+        self.errors.append(LexicalError(lineno, start - line_start + 1,
+          "Invalid raw line feed in string literal"))
+        lineno += 1
+        line_start = pos
+      elif kind == 'invalid':
+        self.errors.append(LexicalError(lineno, start - line_start + 1,
+          "Invalid character in string literal"))
+      else:
+        parts.append(escape_byte(m.group()))
+        line_start += pos - start - 1
+
+
+### TOKEN BUFFER
+# Struct of arrays token storage: the kind id, offset, end, line and column
+# of every token live in parallel array('i') columns instead of one LexToken
+# per token. Values are not stored: they are sliced from the source by
+# offset when read. Only strings whose value differs from their source text
+# are kept.
+
+class TokenBuffer():
+  kinds = VsopLexer.tokens
+  kind_ids = {kind : i for i, kind in enumerate(VsopLexer.tokens)}
+  # Kinds whose values go through the symbol table
+  names = {'type_identifier', 'object_identifier', *VsopLexer.keywords}
+
+  def __init__(self, text, symbols=None):
+    self.source = text
+    self.symbols = new_symbols() if symbols is None else symbols
+    self.kind = array('i')
+    self.offset = array('i')
+    self.end = array('i')
+    self.line = array('i')
+    self.column = array('i')
+    self.strings = {}
+    self.errors = []
+    self.fill(text)
+
+  def __len__(self):
+    return len(self.kind)
+
+  def __iter__(self):
+    for i in range(len(self.kind)):
+      yield self.token(i)
+
+  def type(self, i):
+    return self.kinds[self.kind[i]]
+
+  def value(self, i):
+    if i in self.strings:
+      return self.strings[i]
+    value = self.source[self.offset[i]:self.end[i]]
+    kind = self.kinds[self.kind[i]]
+    if kind == 'integer_literal':
+      if value.startswith('0x'):
+        return int(value[2:], 16)
+      return int(value)
+    if kind in self.names:
+      return (self.symbols.get(value) or add_symbol(self.symbols, value, kind))[0]
+    return value
+
+  def token(self, i):
+    tok = LexToken()
+    tok.type = self.kinds[self.kind[i]]
+    tok.value = self.value(i)
+    tok.lexpos = self.offset[i]
+    return tok
+
+  def fill(self, text):
+    # The spans of VsopRegexLexer.scan_spans, appended to the columns
+    scanner = VsopRegexLexer()
+    scanner.errors = self.errors
+    keywords = VsopLexer.keywords
+    kind_ids = self.kind_ids
+    strings = self.strings
+    add_kind = self.kind.append
+    add_offset = self.offset.append
+    add_end = self.end.append
+    add_line = self.line.append
+    add_column = self.column.append
+    for kind, start, end, line, column, value in scanner.scan_spans(text, text_scanner, str):
+      if kind == 'object_identifier':
+        kind = keywords.get(text[start:end], kind)
+      elif kind == 'operator':
+        kind = operator_type[text[start:end]]
+      elif kind == 'string_literal' and value is not None and value != text[start:end]:
+        strings[len(self.kind)] = value
+      add_kind(kind_ids[kind])
+      add_offset(start)
+      add_end(end)
+      add_line(line)
+      add_column(column)
+
+
+class VsopBufferLexer():
+  # Lexer interface over a TokenBuffer, the parser gets one short lived
+  # LexToken at a time while the whole stream stays in the buffer
+  tokens = VsopLexer.tokens
+
+  def __init__(self, buffer=None):
+    self.buffer = buffer
+    self.errors = buffer.errors if buffer else []
+    self.symbols = buffer.symbols if buffer else new_symbols()
+    self.source = SourceFile(buffer.source if buffer else "")
+    self.index = 0
+
+  def input(self, text):
+    if self.buffer is None or self.buffer.source is not text:
+      self.buffer = TokenBuffer(text, self.symbols)
+      self.source = SourceFile(text)
+    self.errors = self.buffer.errors
+    self.index = 0
+
+  def token(self):
+    if self.index >= len(self.buffer):
+      return None
+    self.index += 1
+    return self.buffer.token(self.index - 1)
+
+  def tokenize(self, text):
+    self.input(text)
+    return list(self.buffer), self.errors
+
+
+LEXER_BACKENDS = {
+  'ply' : VsopLexer,
+  'regex' : VsopRegexLexer,
+  'buffer' : VsopBufferLexer
+}
+
+
 ### MAIN  
 if __name__ == "__main__":
   import sys
@@ -351,4 +842,5 @@ if __name__ == "__main__":
   for e in errors:
     print(e)
   for t in toks:
-    print(f"{t.lineno},{t.column},{t.type}")
+    line, column = lexer.source.position(t.lexpos)
+    print(f"{line},{column},{t.type}")
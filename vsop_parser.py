@@ -20,6 +20,8 @@
 __author__  = "Adrien"
 __version__ = '2.0'
 
+import gc
+import os
 import ply.lex as lex
 import ply.yacc as yacc
 from vsop_lexer import *
@@ -51,39 +53,70 @@ class VsopParser:
   )
 
   
-  def __init__(self, debug=False, text=None):
+  def __init__(self, debug=False, text=None, lexer=None, write_tables=False, flat=False):
     self.errors = []
     self.tokens = VsopLexer.tokens
-    self.lexer = VsopLexer()
-    self.parser = yacc.yacc(module=self, debug=debug, errorlog=yacc.NullLogger()) 
+    self.lexer = lexer if lexer else VsopLexer()
+    # flat builds the tree in an AstArena instead of node objects
+    self.flat = flat
+    self.ast = None
+    self.on_class = None
+    self.max_errors = None
+    self.error_lexpos = None
+    # The LALR tables are shipped in vsop_parsetab.py (make parsetab) and only
+    # read. If the grammar no longer matches them they are rebuilt in memory.
+    self.parser = yacc.yacc(module=self, debug=debug, errorlog=yacc.NullLogger(),
+      tabmodule='vsop_parsetab', write_tables=write_tables,
+      outputdir=os.path.dirname(os.path.abspath(__file__)))
   
-  def parse(self, text):
+  def parse(self, text, on_class=None, max_errors=None):
+    # on_class is called with each Class as soon as its rbrace is reduced,
+    # until the first syntax error.
+    # With max_errors, parsing stops at the first error past the budget.
     self.errors = []
-    result = self.parser.parse(text, lexer=self.lexer)
-    return result, self.errors, self.lexer.errors
-
-  def find_column(self, p, num):
-    return p.lexpos(num)-self.lexer.line_lexpos_array[p.lineno(num)-1]
+    self.on_class = on_class
+    self.max_errors = max_errors
+    self.error_lexpos = None
+    self.ast = AstArena() if self.flat else NodeBuilder()
+    try:
+      result = self.parser.parse(text, lexer=self.lexer,
+        tokenfunc=self.budget_token if max_errors else None)
+    except TooManyErrors:
+      result = None
+    if result is not None:
+      result = self.ast.Program(result, self.lexer.source)
+    self.on_class = self.ast = None
+    return (result,) + trim_errors(self.errors, self.lexer.errors, max_errors)
+
+  def budget_token(self):
+    # Not one more token once max_errors diagnostics are kept
+    if len(self.errors) + len(self.lexer.errors) >= self.max_errors:
+      raise TooManyErrors()
+    return self.lexer.token()
 
 ### GRAMMAR RULES
   def p_program(self, p):
     '''program : class_grammar
                | program class_grammar'''
+    # The class error rules leave no node
     if len(p) == 3:
 
       p[0] = p[1]
-      p[0].add(p[2])
+      if p[2] is not None:
+        p[0].append(p[2])
     else:
-      p[0] = Program([p[1]])
+      p[0] = [] if p[1] is None else [p[1]]
 
   def p_class_grammar(self, p):
     '''class_grammar : class type_identifier lbrace class_body rbrace
                      | class type_identifier extends type_identifier lbrace class_body rbrace'''
     
     if len(p) == 8:
-      p[0] = Class(p[2], p[6][0], p[6][1], p.lineno(1), self.find_column(p, 2), p[4], p.lineno(4), self.find_column(p,4))
+      p[0] = self.ast.Class(p[2], p[6][0], p[6][1], p.lexpos(1), p.lexpos(2), p[4], p.lexpos(4))
     else:
-      p[0] = Class(p[2], p[4][0], p[4][1], p.lineno(1), self.find_column(p, 2))
+      p[0] = self.ast.Class(p[2], p[4][0], p[4][1], p.lexpos(1), p.lexpos(2))
+    if self.on_class and not self.errors:
+      self.on_class(self.ast.node(p[0]))
 
   def p_class_body(self, p):
     '''class_body : class_body field
@@ -93,23 +126,22 @@ class VsopParser:
         p[0] = [[], []]
     else:
       p[0] = p[1]
-      if type(p[2]) == Field:
-        p[0][0].append(p[2])
-      elif type(p[2]) == Method:
-        p[0][1].append(p[2])
+      # The field error rules leave no node
+      if p[2] is not None:
+        p[0][0 if p.slice[2].type == 'field' else 1].append(p[2])
   
   def p_field(self, p):
     '''field : object_identifier colon type semicolon
              | object_identifier colon type assign expression semicolon'''
     if len(p) == 7:
-      p[0] = Field(p[1], p[3], p.lineno(1), self.find_column(p, 1), p[5])
+      p[0] = self.ast.Field(p[1], p[3], p.lexpos(1), p[5])
 
     else:
-      p[0] = Field(p[1], p[3], p.lineno(1), self.find_column(p, 1))
+      p[0] = self.ast.Field(p[1], p[3], p.lexpos(1))
 
   def p_method(self, p):
     '''method : object_identifier lpar formals rpar colon type block'''
-    p[0] = Method(p[1], p[3], p[6], p.lineno(1), self.find_column(p, 1),p[7])
+    p[0] = self.ast.Method(p[1], p[3], p[6], p.lexpos(1), p[7])
 
   def p_type(self, p):
     '''type : type_identifier
@@ -135,11 +167,11 @@ class VsopParser:
   def p_formal(self, p):
     '''formal : object_identifier colon type'''
  
-    p[0] = Formal(p[1], p[3], p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.Formal(p[1], p[3], p.lexpos(1))
 
   def p_block(self,p):
     '''block : lbrace expressions rbrace '''
-    p[0] = Block(p[2], p.lineno(2), self.find_column(p, 2))
+    p[0] = self.ast.Block(p[2], p.lexpos(1))
 
   def p_expressions(self, p):
     '''expressions : expression
@@ -157,35 +189,35 @@ class VsopParser:
     
     
     if len(p) == 5:
-      p[0] = If(p[2], p[4], p.lineno(1), self.find_column(p, 1))
+      p[0] = self.ast.If(p[2], p[4], p.lexpos(1))
       
       
     else:
-      p[0] = If(p[2], p[4], p.lineno(1), self.find_column(p, 1), p[6])
+      p[0] = self.ast.If(p[2], p[4], p.lexpos(1), p[6])
       
 
   def p_expression_while(self, p):
     'expression : while expression do expression'
-    p[0] = While(p[2], p[4], p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.While(p[2], p[4], p.lexpos(1))
 
   def p_expression_let(self, p):
     '''expression : let object_identifier colon type in expression
                   | let object_identifier colon type assign expression in expression'''
 
     if len(p) == 7:
-      p[0] = Let(p[2], p[4], p[6], p.lineno(1), self.find_column(p, 1),p.lineno(2), self.find_column(p, 2))
+      p[0] = self.ast.Let(p[2], p[4], p[6], p.lexpos(1), p.lexpos(2))
     else:
-      p[0] = Let(p[2], p[4], p[8], p.lineno(1), self.find_column(p, 1), p.lineno(2), self.find_column(p, 2),p[6])
+      p[0] = self.ast.Let(p[2], p[4], p[8], p.lexpos(1), p.lexpos(2), p[6])
   
   def p_expression_assign(self, p):
     'expression : object_identifier assign expression'
-    p[0] = Assign(p[1], p[3],p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.Assign(p[1], p[3], p.lexpos(1))
 
   def p_expression_unop(self, p):
     '''expression : not expression
                   | minus expression %prec unary_minus
                   | isnull expression'''
-    p[0] = UnOp(p[1], p[2],p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.UnOp(p[1], p[2], p.lexpos(1))
 
   def p_expression_binop(self, p):
     '''expression : expression and expression
@@ -197,15 +229,15 @@ class VsopParser:
             | expression times expression
             | expression div expression
             | expression pow expression'''
-    p[0] = BinOp(p[2], p[1], p[3],p.lineno(2), self.find_column(p, 2))
+    p[0] = self.ast.BinOp(p[2], p[1], p[3], p.lexpos(2))
 
   def p_expression_call(self, p):
     '''expression : object_identifier lpar args rpar
                   | expression dot object_identifier lpar args rpar'''
     if len(p) == 5:
-      p[0] = Call(p[1],p.lineno(1), self.find_column(p, 1), p[3])
+      p[0] = self.ast.Call(p[1], p.lexpos(1), p[3])
     else:
-      p[0] = Call(p[3], p.lineno(3), self.find_column(p, 3),p[5], p[1])
+      p[0] = self.ast.Call(p[3], p.lexpos(3), p[5], p[1])
 
   def p_args(self,p):
     '''args : expression 
@@ -220,22 +252,25 @@ class VsopParser:
 
   def p_expression_new(self, p):
     '''expression : new type_identifier'''
-    p[0] = New(p[2])
+    p[0] = self.ast.New(p[2])
 
   def p_literal(self,p):
     '''literal : integer_literal
                | string_literal
                | boolean_literal'''
-    p[0] = Literal(p[1],p.lineno(1), self.find_column(p, 1))
+    if p.slice[1].type == 'boolean_literal':
+      p[0] = p[1]
+    else:
+      p[0] = self.ast.Literal(p[1], p.lexpos(1))
 
   def p_boolean_literal(self,p):
     '''boolean_literal : true 
                        | false'''
-    p[0] = Literal(p[1],p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.Boolean(p[1], p.lexpos(1))
 
   def p_expression_unit(self, p):
     '''expression : lpar rpar'''
-    p[0] = Literal("()",p.lineno(1), self.find_column(p, 1))
+    p[0] = self.ast.Literal("()", p.lexpos(1))
 
   def p_expression_par(self, p):
     '''expression : lpar expression rpar'''
@@ -243,7 +278,7 @@ class VsopParser:
 
   def p_expression_object_identifier(self, p):
     '''expression : object_identifier'''
-    p[0] = Object_identifier(p[1], p.lineno(1), self.find_column(p,1))
+    p[0] = self.ast.Object_identifier(p[1], p.lexpos(1))
 
   def p_expression(self, p):
     '''expression : literal
@@ -256,31 +291,436 @@ class VsopParser:
   
 
 ### ERROR HANDLING
-  def handle_error(self, message):
-    error = self.errors.pop()
-    error.message = message
-    self.errors.append(error)
+  # Panic mode recovery: the parser drops tokens up to the next class, class
+  # body, member, block or argument list boundary, so one run reports every
+  # independent error. ply only reports a new one after three tokens were
+  # shifted.
+  def handle_error(self, p, message):
+    # Relabels the error p_error reported at the token the rule's error
+    # stands for. Within three tokens of the last one, p_error was not
+    # called and the error is added.
+    lexpos = next(symbol.lexpos for symbol in p.slice if symbol.type == 'error')
+    if self.errors and lexpos == self.error_lexpos:
+      self.errors[-1].message = message
+    else:
+      line, column = self.lexer.source.position(lexpos)
+      self.errors.append(ParseError(message, line=line, column=column))
 
   def p_class_grammar_error(self, p):
     '''class_grammar : class error lbrace class_body rbrace'''
-    self.handle_error("Unexpected class name")
+    self.handle_error(p, "Unexpected class name")
+
+  def p_class_grammar_header_error(self, p):
+    '''class_grammar : error lbrace class_body rbrace'''
+    # A garbled header (clas C {, class} C {) still has its body parsed
+    pass
 
   def p_field_error_missing_semicolon(self, p):
     '''field : object_identifier colon type error
              | object_identifier colon type assign expression error'''
-    self.handle_error("Missing semicolon")
+    self.handle_error(p, "Missing semicolon")
 
   def p_field_error_missing_type(self, p):
     '''field : object_identifier error semicolon
              | object_identifier error assign expression semicolon'''
-    self.handle_error("Missing or incorrect type")
+    self.handle_error(p, "Missing or incorrect type")
+
+  def p_program_error(self, p):
+    '''program : program error class_grammar'''
+    p[0] = p[1]
+    if p[3] is not None:
+      p[0].append(p[3])
+
+  def p_class_grammar_body_error(self, p):
+    '''class_grammar : class type_identifier lbrace class_body error rbrace
+                     | class type_identifier extends type_identifier lbrace class_body error rbrace'''
+    if len(p) == 9:
+      p[0] = self.ast.Class(p[2], p[6][0], p[6][1], p.lexpos(1), p.lexpos(2), p[4], p.lexpos(4))
+    else:
+      p[0] = self.ast.Class(p[2], p[4][0], p[4][1], p.lexpos(1), p.lexpos(2))
+
+  def p_class_body_error(self, p):
+    '''class_body : class_body error semicolon
+                  | class_body error block'''
+    p[0] = p[1]
+
+  def p_method_error(self, p):
+    '''method : object_identifier lpar error rpar colon type block
+              | object_identifier lpar error block
+              | object_identifier lpar formals rpar error block'''
+    p[0] = self.ast.Method(p[1], [], p[len(p) - 2] if len(p) == 8 else None,
+      p.lexpos(1), p[len(p) - 1])
+
+  def p_block_error(self, p):
+    '''block : lbrace error rbrace
+             | lbrace expressions semicolon error rbrace'''
+    p[0] = self.ast.Block(p[2] if len(p) == 6 else [], p.lexpos(1))
+
+  def p_expressions_error(self, p):
+    '''expressions : error semicolon expression
+                   | expressions semicolon error semicolon expression'''
+    p[0] = p[1] + [p[5]] if len(p) == 6 else [p[3]]
+
+  def p_expression_call_error(self, p):
+    '''expression : object_identifier lpar error rpar
+                  | expression dot object_identifier lpar error rpar'''
+    if len(p) == 5:
+      p[0] = self.ast.Call(p[1], p.lexpos(1), [])
+    else:
+      p[0] = self.ast.Call(p[3], p.lexpos(3), [], p[1])
 
 
   def p_error(self, p):
+    if self.max_errors and len(self.errors) + len(self.lexer.errors) >= self.max_errors:
+      raise TooManyErrors()
     if not p:
+      self.error_lexpos = None
       self.errors.append(ParseError("Unexpected EOF"))
     else:
-      self.errors.append(ParseError("Unexpected Token", line=p.lineno, column=p.column))
+      self.error_lexpos = p.lexpos
+      line, column = self.lexer.source.position(p.lexpos)
+      self.errors.append(ParseError("Unexpected Token", line=line, column=column))
+
+
+class TooManyErrors(Exception):
+  pass
+
+def trim_errors(errors, lex_errors, max_errors):
+  # Keeps the first max_errors diagnostics, lexical ones are printed first
+  if max_errors is None:
+    return errors, lex_errors
+  lex_errors = lex_errors[:max_errors]
+  return errors[:max_errors - len(lex_errors)], lex_errors
+
+
+### RECURSIVE DESCENT PARSER
+class DescentError(Exception):
+  pass
+
+# (level, associativity) of each name of the precedence table, from 1
+precedence_levels = {name : (level, assoc)
+  for level, (assoc, *names) in enumerate(VsopParser.precedence, 1)
+  for name in names}
+
+
+class VsopDescentParser:
+  # Same grammar, AST and positions as VsopParser without ply's LR driver:
+  # recursive descent down to expressions, then precedence climbing over
+  # VsopParser.precedence. Rules without precedence (if, while, let) take
+  # the longest expression, as ply shifts on their conflicts. Any syntax
+  # error hands the text to VsopParser, so its error rules report it.
+  levels = precedence_levels
+  binary = {name : precedence_levels[name] for name in ('and', 'equal',
+    'lower', 'lower_equal', 'plus', 'minus', 'times', 'div', 'pow')}
+  prefix = {'not' : levels['not'], 'minus' : levels['unary_minus'],
+    'isnull' : levels['isnull']}
+  types = ('type_identifier', 'int32', 'bool', 'string', 'unit')
+
+  def __init__(self, debug=False, text=None, lexer=None, flat=False):
+    self.errors = []
+    self.lexer = lexer if lexer else VsopLexer()
+    self.flat = flat
+    self.ast = None
+    self.fallback = None
+    self.on_class = None
+
+  def parse(self, text, on_class=None, max_errors=None):
+    # A text with a syntax error is parsed twice: up to the error here, then
+    # whole again by VsopParser, whose error rules report it. Restarting ply
+    # at the failing class would recover differently from its first state.
+    # Only valid texts get the speed of this parser.
+    self.errors = []
+    self.on_class = on_class
+    self.reported = 0
+    self.stream, _ = self.lexer.tokenize(text)
+    self.kinds = [t.type for t in self.stream] + [None]
+    self.stream.append(None)
+    self.pos = 0
+    self.ast = AstArena() if self.flat else NodeBuilder()
+    # The tree has no reference cycles, as in VsopRegexLexer.tokenize
+    # collecting while it grows only costs time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+      result = self.program()
+    except (DescentError, RecursionError):
+      if not self.fallback:
+        self.fallback = VsopParser(lexer=self.lexer, flat=self.flat)
+      # ply reports again the classes already given to on_class
+      seen = self.reported
+      def resume(cl):
+        nonlocal seen
+        if seen:
+          seen -= 1
+        else:
+          on_class(cl)
+      result, self.errors, _ = self.fallback.parse(text, resume if on_class else None,
+        max_errors)
+    finally:
+      if gc_enabled:
+        gc.enable()
+    self.stream = self.kinds = self.on_class = self.ast = None
+    return (result,) + trim_errors(self.errors, self.lexer.errors, max_errors)
+
+  def expect(self, kind):
+    if self.kinds[self.pos] != kind:
+      raise DescentError()
+    self.pos += 1
+    return self.stream[self.pos - 1]
+
+  def operand_level(self, level, assoc):
+    # Operators of the same level are shifted when right associative
+    return level if assoc == 'right' else level + 1
+
+### CLASSES
+  def program(self):
+    classes = []
+    while True:
+      classes.append(self.class_grammar())
+      if self.on_class:
+        self.on_class(self.ast.node(classes[-1]))
+        self.reported += 1
+      if not self.kinds[self.pos]:
+        return self.ast.Program(classes, self.lexer.source)
+
+  def class_grammar(self):
+    keyword = self.expect('class')
+    name = self.expect('type_identifier')
+    parent = None
+    if self.kinds[self.pos] == 'extends':
+      self.pos += 1
+      parent = self.expect('type_identifier')
+    self.expect('lbrace')
+    fields, methods = [], []
+    while self.kinds[self.pos] == 'object_identifier':
+      if self.kinds[self.pos + 1] == 'lpar':
+        methods.append(self.method())
+      else:
+        fields.append(self.field())
+    self.expect('rbrace')
+    if parent:
+      return self.ast.Class(name.value, fields, methods, keyword.lexpos, name.lexpos,
+        parent.value, parent.lexpos)
+    return self.ast.Class(name.value, fields, methods, keyword.lexpos, name.lexpos)
+
+  def field(self):
+    name = self.expect('object_identifier')
+    self.expect('colon')
+    type = self.type()
+    if self.kinds[self.pos] == 'assign':
+      self.pos += 1
+      init_expr = self.expression()
+      self.expect('semicolon')
+      return self.ast.Field(name.value, type, name.lexpos, init_expr)
+    self.expect('semicolon')
+    return self.ast.Field(name.value, type, name.lexpos)
+
+  def method(self):
+    name = self.expect('object_identifier')
+    formals = self.sequence(self.formal)
+    self.expect('colon')
+    type = self.type()
+    return self.ast.Method(name.value, formals, type, name.lexpos,
+      self.block())
+
+  def type(self):
+    if self.kinds[self.pos] not in self.types:
+      raise DescentError()
+    self.pos += 1
+    return self.stream[self.pos - 1].value
+
+  def formal(self):
+    name = self.expect('object_identifier')
+    self.expect('colon')
+    return self.ast.Formal(name.value, self.type(), name.lexpos)
+
+  def sequence(self, item):
+    # ( [[,] item {, item}] ), the grammar takes a comma before the first item
+    self.expect('lpar')
+    items = []
+    if self.kinds[self.pos] == 'rpar':
+      self.pos += 1
+      return items
+    if self.kinds[self.pos] == 'comma':
+      self.pos += 1
+    items.append(item())
+    while self.kinds[self.pos] == 'comma':
+      self.pos += 1
+      items.append(item())
+    self.expect('rpar')
+    return items
+
+  def block(self):
+    lbrace = self.expect('lbrace')
+    block = [self.expression()]
+    while self.kinds[self.pos] == 'semicolon':
+      self.pos += 1
+      block.append(self.expression())
+    self.expect('rbrace')
+    return self.ast.Block(block, lbrace.lexpos)
+
+### EXPRESSIONS
+  def expression(self, level=0):
+    kinds = self.kinds
+    tok = self.stream[self.pos]
+    kind = kinds[self.pos]
+    self.pos += 1
+    if kind == 'object_identifier':
+      if kinds[self.pos] == 'assign':
+        self.pos += 1
+        return self.ast.Assign(tok.value, self.expression(self.operand_level(*self.levels['assign'])),
+          tok.lexpos)
+      if kinds[self.pos] == 'lpar':
+        expr = self.ast.Call(tok.value, tok.lexpos, self.sequence(self.expression))
+      else:
+        expr = self.ast.Object_identifier(tok.value, tok.lexpos)
+    elif kind == 'integer_literal' or kind == 'string_literal':
+      expr = self.ast.Literal(tok.value, tok.lexpos)
+    elif kind in self.prefix:
+      expr = self.ast.UnOp(tok.value, self.expression(self.operand_level(*self.prefix[kind])),
+        tok.lexpos)
+    elif kind == 'true' or kind == 'false':
+      expr = self.ast.Boolean(tok.value, tok.lexpos)
+    elif kind == 'lpar':
+      if kinds[self.pos] == 'rpar':
+        self.pos += 1
+        expr = self.ast.Literal("()", tok.lexpos)
+      else:
+        expr = self.expression()
+        self.expect('rpar')
+    elif kind == 'lbrace':
+      self.pos -= 1
+      expr = self.block()
+    elif kind == 'new':
+      expr = self.ast.New(self.expect('type_identifier').value)
+    elif kind == 'if':
+      cond_expr = self.expression()
+      self.expect('then')
+      then_expr = self.expression()
+      if kinds[self.pos] != 'else':
+        return self.ast.If(cond_expr, then_expr, tok.lexpos)
+      self.pos += 1
+      return self.ast.If(cond_expr, then_expr, tok.lexpos, self.expression())
+    elif kind == 'while':
+      cond_expr = self.expression()
+      self.expect('do')
+      return self.ast.While(cond_expr, self.expression(), tok.lexpos)
+    elif kind == 'let':
+      name = self.expect('object_identifier')
+      self.expect('colon')
+      type = self.type()
+      init_expr = None
+      if kinds[self.pos] == 'assign':
+        self.pos += 1
+        init_expr = self.expression()
+      self.expect('in')
+      return self.ast.Let(name.value, type, self.expression(), tok.lexpos,
+        name.lexpos, init_expr)
+    else:
+      raise DescentError()
+
+    # Dot binds tighter than any operator, it only follows a primary
+    while kinds[self.pos] == 'dot':
+      self.pos += 1
+      name = self.expect('object_identifier')
+      expr = self.ast.Call(name.value, name.lexpos, self.sequence(self.expression), expr)
+
+    binary = self.binary
+    last = None
+    while kinds[self.pos] in binary:
+      op_level, assoc = binary[kinds[self.pos]]
+      if op_level < level:
+        break
+      if assoc == 'nonassoc' and last == op_level:
+        raise DescentError()
+      op = self.stream[self.pos]
+      self.pos += 1
+      expr = self.ast.BinOp(op.value, expr, self.expression(self.operand_level(op_level, assoc)),
+        op.lexpos)
+      last = op_level
+    return expr
+
+
+### INCREMENTAL PARSING
+class ParseSession:
+  # Parses successive versions of a text, keeping the classes of the last
+  # one keyed by their source span (the text from their 'class' keyword to
+  # the next one, the first one also has what comes before it: blank
+  # lines, a header comment). Spans seen before reuse their Class node,
+  # moved to its new offset. Other spans are parsed alone. A text with any
+  # error is parsed whole, so errors are always those of a full parse.
+  # Reused nodes are moved in place and shared by successive results, the
+  # semantic analysis rewrites its tree so it must not be given one.
+  def __init__(self, parser=None):
+    self.parser = parser if parser else VsopParser()
+    self.classes = {}
+    self.parsed = 0
+    self.reused = 0
+
+  def class_spans(self, text, buffer):
+    # (start, end) of each class, None if the text has none. Tokens before
+    # the first class make its span fail to parse, the text is then whole
+    class_id = buffer.kind_ids['class']
+    starts = [buffer.offset[i] for i, kind in enumerate(buffer.kind) if kind == class_id]
+    if not starts:
+      return None
+    starts[0] = 0
+    return list(zip(starts, starts[1:] + [len(text)]))
+
+  def parse(self, text):
+    self.parsed = self.reused = 0
+    buffer = TokenBuffer(text)
+    spans = None if buffer.errors else self.class_spans(text, buffer)
+    if not spans:
+      return self.parse_whole(text, spans)
+
+    # Nothing is moved before every new span parsed without error
+    plan = []
+    taken = {}
+    for start, end in spans:
+      source = text[start:end]
+      entries = self.classes.get(source, ())
+      index = taken.get(source, 0)
+      if index < len(entries):
+        taken[source] = index + 1
+        plan.append((source, start, entries[index], None))
+        continue
+      result, errors, lex_errors = self.parser.parse(source)
+      if errors or lex_errors:
+        return self.parse_whole(text, spans)
+      plan.append((source, start, None, result.list_class[0]))
+
+    classes = []
+    self.classes = {}
+    for source, start, entry, node in plan:
+      if entry:
+        node = entry[1]
+        if start != entry[0]:
+          shift_offsets(node, start - entry[0])
+        self.reused += 1
+      else:
+        if start:
+          shift_offsets(node, start)
+        self.parsed += 1
+      self.classes.setdefault(source, []).append((start, node))
+      classes.append(node)
+    return Program(classes, SourceFile(text)), [], []
+
+  def parse_whole(self, text, spans):
+    # The classes of the last text without errors stay known
+    result, errors, lex_errors = self.parser.parse(text)
+    if spans and not errors and not lex_errors:
+      self.parsed = len(spans)
+      self.classes = {}
+      for (start, end), node in zip(spans, result.list_class):
+        self.classes.setdefault(text[start:end], []).append((start, node))
+    return result, errors, lex_errors
+
+
+PARSER_BACKENDS = {
+  'ply' : VsopParser,
+  'descent' : VsopDescentParser
+}
 
 
 ### MAIN
@@ -0,0 +1,107 @@
+
+# vsop_parsetab.py
+# This file is automatically generated. Do not edit.
+# pylint: disable=W,C,R
+_tabversion = '3.10'
+
+_lr_method = 'LALR'
+
+_lr_signature = 'rightassignleftandrightnotnonassocequallowerlower_equalleftplusminuslefttimesdivrightisnullunary_minusrightpowleftdotand assign bool class colon comma div do dot else eof equal extends false if in int32 integer_literal isnull lbrace let lower lower_equal lpar minus new not object_identifier plus pow rbrace rpar semicolon string string_literal then times true type_identifier unit whileprogram : class_grammar\n               | program class_grammarclass_grammar : class type_identifier lbrace class_body rbrace\n                     | class type_identifier extends type_identifier lbrace class_body rbraceclass_body : class_body field\n                  | class_body method\n                  | field : object_identifier colon type semicolon\n             | object_identifier colon type assign expression semicolonmethod : object_identifier lpar formals rpar colon type blocktype : type_identifier\n            | int32\n            | bool\n            | string\n            | unitformals : formal\n               | formals comma formal\n               | formal : object_identifier colon typeblock : lbrace expressions rbrace expressions : expression\n                   | expressions semicolon expressionexpression : if expression then expression\n                  | if expression then expression else expressionexpression : while expression do expressionexpression : let object_identifier colon type in expression\n                  | let object_identifier colon type assign expression in expressionexpression : object_identifier assign expressionexpression : not expression\n                  | minus expression %prec unary_minus\n                  | isnull expressionexpression : expression and expression\n            | expression equal expression\n            | expression lower_equal expression\n            | expression lower expression\n            | expression plus expression\n            | expression minus expression\n            | expression times expression\n            | expression div expression\n            | expression pow expressionexpression : object_identifier lpar args rpar\n                  | expression dot object_identifier lpar args rparargs : expression \n            | args comma expression\n            | expression : new type_identifierliteral : integer_literal\n               | string_literal\n               | boolean_literalboolean_literal : true \n                       | falseexpression : lpar rparexpression : lpar expression rparexpression : object_identifierexpression : literal\n                  | blockempty :class_grammar : class error lbrace class_body rbraceclass_grammar : error lbrace class_body rbracefield : object_identifier colon type error\n             | object_identifier colon type assign expression errorfield : object_identifier error semicolon\n             | object_identifier error assign expression semicolonprogram : program error class_grammarclass_grammar : class type_identifier lbrace class_body error rbrace\n                     | class type_identifier extends type_identifier lbrace class_body error rbraceclass_body : class_body error semicolon\n                  | class_body error blockmethod : object_identifier lpar error rpar colon type block\n              | object_identifier lpar error block\n              | object_identifier lpar formals rpar error blockblock : lbrace error rbrace\n             | lbrace expressions semicolon error rbraceexpressions : error semicolon expression\n                   | expressions semicolon error semicolon expressionexpression : object_identifier lpar error rpar\n                  | expression dot object_identifier lpar error rpar'
+    
+_lr_action_items = {'class':([0,1,2,5,6,10,16,29,32,64,100,130,],[4,4,-1,-2,4,-64,-59,-3,-58,-65,-4,-66,]),'error':([0,1,2,4,5,6,7,10,11,12,14,16,17,18,19,20,22,23,24,25,28,29,31,32,39,45,46,47,48,49,50,51,52,53,54,55,56,57,58,64,65,66,67,68,84,85,86,87,88,90,91,93,96,99,100,105,106,107,108,109,110,111,112,113,118,122,123,124,130,132,133,134,135,137,139,140,141,143,152,153,154,155,156,157,160,],[3,6,-1,9,-2,3,-7,-64,15,-7,-7,-59,-5,-6,27,30,15,-67,-68,34,62,-3,-7,-58,-54,-55,-56,-47,-48,-49,-50,-51,93,-11,-12,-13,-14,-15,-62,-65,101,-20,102,-72,120,-29,-30,-31,-52,-46,-8,-60,127,-70,-4,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,141,-63,-66,-73,147,-23,-25,-41,-76,-9,-61,-71,-10,-69,-42,-77,-24,-26,-27,]),'$end':([1,2,5,10,16,29,32,64,100,130,],[0,-1,-2,-64,-59,-3,-58,-65,-4,-66,]),'lbrace':([3,6,8,9,15,21,25,30,36,37,40,41,42,43,53,54,55,56,57,59,62,67,69,70,71,72,73,74,75,76,77,78,83,84,92,101,115,116,127,131,133,138,142,144,148,149,150,159,],[7,7,12,14,25,31,25,25,25,25,25,25,25,25,-11,-12,-13,-14,-15,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,25,]),'type_identifier':([4,13,26,44,95,117,126,129,],[8,21,53,90,53,53,53,53,]),'rbrace':([7,11,12,14,17,18,20,22,23,24,30,31,33,34,35,39,45,46,47,48,49,50,51,58,65,66,68,85,86,87,88,90,91,93,99,101,102,103,104,105,106,107,108,109,110,111,112,113,118,122,124,132,134,135,137,139,140,141,143,145,152,153,154,155,156,157,160,],[-7,16,-7,-7,-5,-6,29,32,-67,-68,64,-7,66,68,-21,-54,-55,-56,-47,-48,-49,-50,-51,-62,100,-20,-72,-29,-30,-31,-52,-46,-8,-60,-70,130,132,-22,-74,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,-63,-73,-23,-25,-41,-76,-9,-61,-71,-75,-10,-69,-42,-77,-24,-26,-27,]),'object_identifier':([7,11,12,14,17,18,20,22,23,24,25,28,31,36,37,38,40,41,42,43,58,59,65,66,67,68,69,70,71,72,73,74,75,76,77,78,79,83,84,91,92,93,97,99,115,116,124,131,132,133,138,140,141,143,148,149,150,152,153,159,],[-7,19,-7,-7,-5,-6,19,19,-67,-68,39,60,-7,39,39,82,39,39,39,39,-62,39,19,-20,39,-72,39,39,39,39,39,39,39,39,39,39,114,39,39,-8,39,-60,60,-70,39,39,-63,39,-73,39,39,-9,-61,-71,39,39,39,-10,-69,39,]),'extends':([8,],[13,]),'semicolon':([15,27,30,33,34,35,39,45,46,47,48,49,50,51,52,53,54,55,56,57,66,68,85,86,87,88,90,94,101,102,103,104,105,106,107,108,109,110,111,112,113,118,122,123,132,134,135,137,139,145,154,155,156,157,160,],[23,58,23,67,69,-21,-54,-55,-56,-47,-48,-49,-50,-51,91,-11,-12,-13,-14,-15,-20,-72,-29,-30,-31,-52,-46,124,23,131,-22,-74,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,140,-73,-23,-25,-41,-76,-75,-42,-77,-24,-26,-27,]),'colon':([19,60,82,96,98,],[26,95,117,126,129,]),'lpar':([19,25,36,37,39,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,114,115,116,131,133,138,148,149,150,159,],[28,43,43,43,84,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,43,133,43,43,43,43,43,43,43,43,43,]),'if':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,36,]),'while':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,37,]),'let':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,38,]),'not':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,40,]),'minus':([25,35,36,37,39,40,41,42,43,45,46,47,48,49,50,51,59,66,67,68,69,70,71,72,73,74,75,76,77,78,80,81,83,84,85,86,87,88,89,90,92,94,103,104,105,106,107,108,109,110,111,112,113,115,116,118,121,122,123,131,132,133,134,135,137,138,139,145,148,149,150,151,154,155,156,157,158,159,160,],[41,75,41,41,-54,41,41,41,41,-55,-56,-47,-48,-49,-50,-51,41,-20,41,-72,41,41,41,41,41,41,41,41,41,41,75,75,41,41,75,-30,-31,-52,75,-46,41,75,75,75,75,75,75,75,-36,-37,-38,-39,-40,41,41,75,75,-53,75,41,-73,41,75,75,-41,41,-76,75,41,41,41,75,-42,-77,75,75,75,41,75,]),'isnull':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,42,]),'new':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,44,]),'integer_literal':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,47,]),'string_literal':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,48,]),'true':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,50,]),'false':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,51,]),'int32':([26,95,117,126,129,],[54,54,54,54,54,]),'bool':([26,95,117,126,129,],[55,55,55,55,55,]),'string':([26,95,117,126,129,],[56,56,56,56,56,]),'unit':([26,95,117,126,129,],[57,57,57,57,57,]),'assign':([27,39,52,53,54,55,56,57,136,],[59,83,92,-11,-12,-13,-14,-15,150,]),'rpar':([28,39,43,45,46,47,48,49,50,51,53,54,55,56,57,61,62,63,66,68,84,85,86,87,88,89,90,105,106,107,108,109,110,111,112,113,118,119,120,121,122,125,128,132,133,134,135,137,139,146,147,151,154,155,156,157,160,],[-18,-54,88,-55,-56,-47,-48,-49,-50,-51,-11,-12,-13,-14,-15,96,98,-16,-20,-72,-45,-29,-30,-31,-52,122,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,137,139,-43,-53,-19,-17,-73,-45,-23,-25,-41,-76,154,155,-44,-42,-77,-24,-26,-27,]),'comma':([28,39,45,46,47,48,49,50,51,53,54,55,56,57,61,63,66,68,84,85,86,87,88,90,105,106,107,108,109,110,111,112,113,118,119,121,122,125,128,132,133,134,135,137,139,146,151,154,155,156,157,160,],[-18,-54,-55,-56,-47,-48,-49,-50,-51,-11,-12,-13,-14,-15,97,-16,-20,-72,-45,-29,-30,-31,-52,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,138,-43,-53,-19,-17,-73,-45,-23,-25,-41,-76,138,-44,-42,-77,-24,-26,-27,]),'and':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[70,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,70,70,-29,-30,-31,-52,70,-46,70,70,70,-32,-33,-34,-35,-36,-37,-38,-39,-40,70,70,-53,70,-73,70,70,-41,-76,70,70,-42,-77,70,70,70,70,]),'equal':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[71,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,71,71,71,-30,-31,-52,71,-46,71,71,71,71,None,None,None,-36,-37,-38,-39,-40,71,71,-53,71,-73,71,71,-41,-76,71,71,-42,-77,71,71,71,71,]),'lower_equal':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[72,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,72,72,72,-30,-31,-52,72,-46,72,72,72,72,None,None,None,-36,-37,-38,-39,-40,72,72,-53,72,-73,72,72,-41,-76,72,72,-42,-77,72,72,72,72,]),'lower':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[73,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,73,73,73,-30,-31,-52,73,-46,73,73,73,73,None,None,None,-36,-37,-38,-39,-40,73,73,-53,73,-73,73,73,-41,-76,73,73,-42,-77,73,73,73,73,]),'plus':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[74,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,74,74,74,-30,-31,-52,74,-46,74,74,74,74,74,74,74,-36,-37,-38,-39,-40,74,74,-53,74,-73,74,74,-41,-76,74,74,-42,-77,74,74,74,74,]),'times':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[76,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,76,76,76,-30,-31,-52,76,-46,76,76,76,76,76,76,76,76,76,-38,-39,-40,76,76,-53,76,-73,76,76,-41,-76,76,76,-42,-77,76,76,76,76,]),'div':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[77,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,77,77,77,-30,-31,-52,77,-46,77,77,77,77,77,77,77,77,77,-38,-39,-40,77,77,-53,77,-73,77,77,-41,-76,77,77,-42,-77,77,77,77,77,]),'pow':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[78,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,78,78,78,78,78,-52,78,-46,78,78,78,78,78,78,78,78,78,78,78,78,78,78,-53,78,-73,78,78,-41,-76,78,78,-42,-77,78,78,78,78,]),'dot':([35,39,45,46,47,48,49,50,51,66,68,80,81,85,86,87,88,89,90,94,103,104,105,106,107,108,109,110,111,112,113,118,121,122,123,132,134,135,137,139,145,151,154,155,156,157,158,160,],[79,-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,79,79,79,79,79,-52,79,-46,79,79,79,79,79,79,79,79,79,79,79,79,79,79,-53,79,-73,79,79,-41,-76,79,79,-42,-77,79,79,79,79,]),'then':([39,45,46,47,48,49,50,51,66,68,80,85,86,87,88,90,105,106,107,108,109,110,111,112,113,118,122,132,134,135,137,139,154,155,156,157,160,],[-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,115,-29,-30,-31,-52,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,-73,-23,-25,-41,-76,-42,-77,-24,-26,-27,]),'do':([39,45,46,47,48,49,50,51,66,68,81,85,86,87,88,90,105,106,107,108,109,110,111,112,113,118,122,132,134,135,137,139,154,155,156,157,160,],[-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,116,-29,-30,-31,-52,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,-73,-23,-25,-41,-76,-42,-77,-24,-26,-27,]),'else':([39,45,46,47,48,49,50,51,66,68,85,86,87,88,90,105,106,107,108,109,110,111,112,113,118,122,132,134,135,137,139,154,155,156,157,160,],[-54,-55,-56,-47,-48,-49,-50,-51,-20,-72,-29,-30,-31,-52,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,-73,148,-25,-41,-76,-42,-77,-24,-26,-27,]),'in':([39,45,46,47,48,49,50,51,53,54,55,56,57,66,68,85,86,87,88,90,105,106,107,108,109,110,111,112,113,118,122,132,134,135,136,137,139,154,155,156,157,158,160,],[-54,-55,-56,-47,-48,-49,-50,-51,-11,-12,-13,-14,-15,-20,-72,-29,-30,-31,-52,-46,-32,-33,-34,-35,-36,-37,-38,-39,-40,-28,-53,-73,-23,-25,149,-41,-76,-42,-77,-24,-26,159,-27,]),}
+
+_lr_action = {}
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = {}
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'program':([0,],[1,]),'class_grammar':([0,1,6,],[2,5,10,]),'class_body':([7,12,14,31,],[11,20,22,65,]),'field':([11,20,22,65,],[17,17,17,17,]),'method':([11,20,22,65,],[18,18,18,18,]),'block':([15,25,30,36,37,40,41,42,43,59,62,67,69,70,71,72,73,74,75,76,77,78,83,84,92,101,115,116,127,131,133,138,142,144,148,149,150,159,],[24,46,24,46,46,46,46,46,46,46,99,46,46,46,46,46,46,46,46,46,46,46,46,46,46,24,46,46,143,46,46,46,152,153,46,46,46,46,]),'expressions':([25,],[33,]),'expression':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[35,80,81,85,86,87,89,94,103,104,105,106,107,108,109,110,111,112,113,118,121,123,134,135,145,121,151,156,157,158,160,]),'literal':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,45,]),'boolean_literal':([25,36,37,40,41,42,43,59,67,69,70,71,72,73,74,75,76,77,78,83,84,92,115,116,131,133,138,148,149,150,159,],[49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,49,]),'type':([26,95,117,126,129,],[52,125,136,142,144,]),'formals':([28,],[61,]),'formal':([28,97,],[63,128,]),'args':([84,133,],[119,146,]),}
+
+_lr_goto = {}
+for _k, _v in _lr_goto_items.items():
+   for _x, _y in zip(_v[0], _v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = {}
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> program","S'",1,None,None,None),
+  ('program -> class_grammar','program',1,'p_program','vsop_parser.py',98),
+  ('program -> program class_grammar','program',2,'p_program','vsop_parser.py',99),
+  ('class_grammar -> class type_identifier lbrace class_body rbrace','class_grammar',5,'p_class_grammar','vsop_parser.py',108),
+  ('class_grammar -> class type_identifier extends type_identifier lbrace class_body rbrace','class_grammar',7,'p_class_grammar','vsop_parser.py',109),
+  ('class_body -> class_body field','class_body',2,'p_class_body','vsop_parser.py',119),
+  ('class_body -> class_body method','class_body',2,'p_class_body','vsop_parser.py',120),
+  ('class_body -> <empty>','class_body',0,'p_class_body','vsop_parser.py',121),
+  ('field -> object_identifier colon type semicolon','field',4,'p_field','vsop_parser.py',131),
+  ('field -> object_identifier colon type assign expression semicolon','field',6,'p_field','vsop_parser.py',132),
+  ('method -> object_identifier lpar formals rpar colon type block','method',7,'p_method','vsop_parser.py',140),
+  ('type -> type_identifier','type',1,'p_type','vsop_parser.py',144),
+  ('type -> int32','type',1,'p_type','vsop_parser.py',145),
+  ('type -> bool','type',1,'p_type','vsop_parser.py',146),
+  ('type -> string','type',1,'p_type','vsop_parser.py',147),
+  ('type -> unit','type',1,'p_type','vsop_parser.py',148),
+  ('formals -> formal','formals',1,'p_formals','vsop_parser.py',152),
+  ('formals -> formals comma formal','formals',3,'p_formals','vsop_parser.py',153),
+  ('formals -> <empty>','formals',0,'p_formals','vsop_parser.py',154),
+  ('formal -> object_identifier colon type','formal',3,'p_formal','vsop_parser.py',165),
+  ('block -> lbrace expressions rbrace','block',3,'p_block','vsop_parser.py',170),
+  ('expressions -> expression','expressions',1,'p_expressions','vsop_parser.py',174),
+  ('expressions -> expressions semicolon expression','expressions',3,'p_expressions','vsop_parser.py',175),
+  ('expression -> if expression then expression','expression',4,'p_expression_if','vsop_parser.py',184),
+  ('expression -> if expression then expression else expression','expression',6,'p_expression_if','vsop_parser.py',185),
+  ('expression -> while expression do expression','expression',4,'p_expression_while','vsop_parser.py',197),
+  ('expression -> let object_identifier colon type in expression','expression',6,'p_expression_let','vsop_parser.py',201),
+  ('expression -> let object_identifier colon type assign expression in expression','expression',8,'p_expression_let','vsop_parser.py',202),
+  ('expression -> object_identifier assign expression','expression',3,'p_expression_assign','vsop_parser.py',210),
+  ('expression -> not expression','expression',2,'p_expression_unop','vsop_parser.py',214),
+  ('expression -> minus expression','expression',2,'p_expression_unop','vsop_parser.py',215),
+  ('expression -> isnull expression','expression',2,'p_expression_unop','vsop_parser.py',216),
+  ('expression -> expression and expression','expression',3,'p_expression_binop','vsop_parser.py',220),
+  ('expression -> expression equal expression','expression',3,'p_expression_binop','vsop_parser.py',221),
+  ('expression -> expression lower_equal expression','expression',3,'p_expression_binop','vsop_parser.py',222),
+  ('expression -> expression lower expression','expression',3,'p_expression_binop','vsop_parser.py',223),
+  ('expression -> expression plus expression','expression',3,'p_expression_binop','vsop_parser.py',224),
+  ('expression -> expression minus expression','expression',3,'p_expression_binop','vsop_parser.py',225),
+  ('expression -> expression times expression','expression',3,'p_expression_binop','vsop_parser.py',226),
+  ('expression -> expression div expression','expression',3,'p_expression_binop','vsop_parser.py',227),
+  ('expression -> expression pow expression','expression',3,'p_expression_binop','vsop_parser.py',228),
+  ('expression -> object_identifier lpar args rpar','expression',4,'p_expression_call','vsop_parser.py',232),
+  ('expression -> expression dot object_identifier lpar args rpar','expression',6,'p_expression_call','vsop_parser.py',233),
+  ('args -> expression','args',1,'p_args','vsop_parser.py',240),
+  ('args -> args comma expression','args',3,'p_args','vsop_parser.py',241),
+  ('args -> <empty>','args',0,'p_args','vsop_parser.py',242),
+  ('expression -> new type_identifier','expression',2,'p_expression_new','vsop_parser.py',251),
+  ('literal -> integer_literal','literal',1,'p_literal','vsop_parser.py',255),
+  ('literal -> string_literal','literal',1,'p_literal','vsop_parser.py',256),
+  ('literal -> boolean_literal','literal',1,'p_literal','vsop_parser.py',257),
+  ('boolean_literal -> true','boolean_literal',1,'p_boolean_literal','vsop_parser.py',264),
+  ('boolean_literal -> false','boolean_literal',1,'p_boolean_literal','vsop_parser.py',265),
+  ('expression -> lpar rpar','expression',2,'p_expression_unit','vsop_parser.py',269),
+  ('expression -> lpar expression rpar','expression',3,'p_expression_par','vsop_parser.py',273),
+  ('expression -> object_identifier','expression',1,'p_expression_object_identifier','vsop_parser.py',277),
+  ('expression -> literal','expression',1,'p_expression','vsop_parser.py',281),
+  ('expression -> block','expression',1,'p_expression','vsop_parser.py',282),
+  ('empty -> <empty>','empty',0,'p_empty','vsop_parser.py',286),
+  ('class_grammar -> class error lbrace class_body rbrace','class_grammar',5,'p_class_grammar_error','vsop_parser.py',306),
+  ('class_grammar -> error lbrace class_body rbrace','class_grammar',4,'p_class_grammar_header_error','vsop_parser.py',310),
+  ('field -> object_identifier colon type error','field',4,'p_field_error_missing_semicolon','vsop_parser.py',315),
+  ('field -> object_identifier colon type assign expression error','field',6,'p_field_error_missing_semicolon','vsop_parser.py',316),
+  ('field -> object_identifier error semicolon','field',3,'p_field_error_missing_type','vsop_parser.py',320),
+  ('field -> object_identifier error assign expression semicolon','field',5,'p_field_error_missing_type','vsop_parser.py',321),
+  ('program -> program error class_grammar','program',3,'p_program_error','vsop_parser.py',325),
+  ('class_grammar -> class type_identifier lbrace class_body error rbrace','class_grammar',6,'p_class_grammar_body_error','vsop_parser.py',330),
+  ('class_grammar -> class type_identifier extends type_identifier lbrace class_body error rbrace','class_grammar',8,'p_class_grammar_body_error','vsop_parser.py',331),
+  ('class_body -> class_body error semicolon','class_body',3,'p_class_body_error','vsop_parser.py',338),
+  ('class_body -> class_body error block','class_body',3,'p_class_body_error','vsop_parser.py',339),
+  ('method -> object_identifier lpar error rpar colon type block','method',7,'p_method_error','vsop_parser.py',343),
+  ('method -> object_identifier lpar error block','method',4,'p_method_error','vsop_parser.py',344),
+  ('method -> object_identifier lpar formals rpar error block','method',6,'p_method_error','vsop_parser.py',345),
+  ('block -> lbrace error rbrace','block',3,'p_block_error','vsop_parser.py',350),
+  ('block -> lbrace expressions semicolon error rbrace','block',5,'p_block_error','vsop_parser.py',351),
+  ('expressions -> error semicolon expression','expressions',3,'p_expressions_error','vsop_parser.py',355),
+  ('expressions -> expressions semicolon error semicolon expression','expressions',5,'p_expressions_error','vsop_parser.py',356),
+  ('expression -> object_identifier lpar error rpar','expression',4,'p_expression_call_error','vsop_parser.py',360),
+  ('expression -> expression dot object_identifier lpar error rpar','expression',6,'p_expression_call_error','vsop_parser.py',361),
+]
@@ -17,7 +17,15 @@ __version__ = '2.0'
 
 
 from vsop_ast import *
-import copy
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from types import GeneratorType
+import io
+import multiprocessing
+
+# Type names are interned by the lexer, as these constants, so the checks
+# below hash and compare them by identity
+primitive_types = frozenset(("unit", "bool", "int32", "string"))
 
 class SemError():
   def __init__(self, message, line=None, column=None):
@@ -30,15 +38,230 @@ class SemError():
       return f"semantic error: {self.message}"
     return f"{self.line}:{self.column}: semantic error: {self.message}"
 
-class VsopSem:
-  def __init__(self):
+### CLASS HIERARCHY
+
+# Subtyping and first common ancestors of the classes, once the inheritance
+# has no loop. The classes are numbered so that the subclasses of a class
+# are the numbers in [enter, leave) of it, a subtype test is then two
+# comparisons. order has the classes each after its parent, the numbers are
+# given in it from the sizes of the subtrees. jumps[name][k] is the 2^k-th
+# ancestor of a class, lca climbs them in O(log n).
+class ClassHierarchy():
+  def __init__(self, classes, order):
+    sizes = dict.fromkeys(order, 1)
+    for name in reversed(order):
+      parent = classes[name].parent
+      if parent is not None:
+        sizes[parent] += sizes[name]
+    self.enter = {}
+    self.leave = {}
+    self.jumps = all_jumps = {}
+    # The next number free among the subclasses of a class
+    free = {None: 0}
+    for name in order:
+      parent = classes[name].parent
+      self.enter[name] = enter = free[parent]
+      free[parent] += sizes[name]
+      free[name] = enter + 1
+      self.leave[name] = enter + sizes[name]
+      if parent is None:
+        all_jumps[name] = []
+        continue
+      # jumps[k + 1] is the 2^k-th ancestor of jumps[k]
+      all_jumps[name] = jumps = [parent]
+      up = all_jumps[parent]
+      while len(up) >= len(jumps):
+        jumps.append(up[len(jumps) - 1])
+        up = all_jumps[jumps[-1]]
+
+  def is_subtype(self, name, ancestor):
+    # Whether the class name conforms to ancestor (always False for a type
+    # that is not a class)
+    i = self.enter.get(name)
+    j = self.enter.get(ancestor)
+    return i is not None and j is not None and j <= i < self.leave[ancestor]
+
+  def lca(self, a, b):
+    if self.is_subtype(b, a):
+      return a
+    # Climbs a to the highest ancestor that is not one of b, its parent is
+    # then the first common one
+    jumps = self.jumps
+    for k in range(len(jumps[a]) - 1, -1, -1):
+      if k < len(jumps[a]) and not self.is_subtype(b, jumps[a][k]):
+        a = jumps[a][k]
+    return jumps[a][0]
+
+### MEMBER TABLES
+
+# The fields or the methods a class inherits, by name. A table is never
+# changed: including() gives a new table that shares every entry of the old
+# one, so the table of a class is the one of its parent plus the members of
+# the parent, at O(log n) per member and without a copy. It is a trie on
+# the hash of the names, of 16 slots per level. A slot is None, a level (a
+# list), a (name, member) leaf or, for names of equal hashes, a dict.
+class Members(Mapping):
+  __slots__ = ('root', 'size')
+
+  def __init__(self, root=None, size=0):
+    self.root = empty_level if root is None else root
+    self.size = size
+
+  def including(self, members):
+    # This table with the members of a dict, over its entries of same name
+    root = self.root
+    size = self.size
+    for name, member in members.items():
+      root, added = members_insert(root, name, member, hash(name), 0)
+      size += added
+    return Members(root, size)
+
+  def get(self, name, default=None):
+    level = self.root
+    h = hash(name)
+    depth = 0
+    while True:
+      slot = level[h >> 4 * depth & 15]
+      if type(slot) is list:
+        level = slot
+        depth += 1
+      elif type(slot) is tuple:
+        return slot[1] if slot[0] == name else default
+      elif slot is None:
+        return default
+      else:
+        return slot.get(name, default)
+
+  def __getitem__(self, name):
+    member = self.get(name, missing)
+    if member is missing:
+      raise KeyError(name)
+    return member
+
+  def __contains__(self, name):
+    return self.get(name, missing) is not missing
+
+  def __iter__(self):
+    stack = [self.root]
+    while stack:
+      for slot in stack.pop():
+        if type(slot) is list:
+          stack.append(slot)
+        elif type(slot) is tuple:
+          yield slot[0]
+        elif slot is not None:
+          yield from slot
+
+  def __len__(self):
+    return self.size
+
+empty_level = [None] * 16
+missing = object()
+
+def members_insert(level, name, member, h, depth):
+  # A copy of the level with the member, and 1 if the name is new. Only the
+  # levels on the path to the name are copied
+  level = list(level)
+  i = h >> 4 * depth & 15
+  slot = level[i]
+  added = 1
+  if slot is None:
+    level[i] = (name, member)
+  elif type(slot) is list:
+    level[i], added = members_insert(slot, name, member, h, depth + 1)
+  elif type(slot) is tuple and slot[0] == name:
+    level[i] = (name, member)
+    added = 0
+  elif type(slot) is tuple and depth < 15:
+    # Two names in one slot, the leaf goes down a level
+    below, _ = members_insert(empty_level, slot[0], slot[1], hash(slot[0]), depth + 1)
+    level[i], added = members_insert(below, name, member, h, depth + 1)
+  elif type(slot) is tuple:
+    # The 64 bits of their hashes are the same
+    level[i] = {slot[0]: slot[1], name: member}
+  else:
+    added = int(name not in slot)
+    level[i] = {**slot, name: member}
+  return level, added
+
+### SCOPES
+
+# The variables an expression sees: its lets and the formals of its method
+# in one dict, then the fields of its class. A let binds its variable for
+# its scope expression and unbinds it after, giving back the one it shadowed,
+# so entering and leaving a let is O(1) at any depth.
+class Scope():
+  __slots__ = ('cl', 'names')
+
+  def __init__(self, cl, formals={}):
+    self.cl = cl
+    self.names = dict(formals)
+
+  def bind(self, name, var):
+    shadowed = self.names.get(name)
+    self.names[name] = var
+    return shadowed
+
+  def unbind(self, name, shadowed):
+    if shadowed is None:
+      del self.names[name]
+    else:
+      self.names[name] = shadowed
+
+  def lookup(self, name):
+    # The Local_variable, Formal or Field named name, None if there is none
+    var = self.names.get(name)
+    if var is None:
+      var = self.cl.fields.get(name)
+    if var is None:
+      var = self.cl.inhe_fields.get(name)
+    return var
+
+class VsopSem(Visitor):
+  # jobs > 1 checks the types of the 4th pass in that many processes, as
+  # asked: they only pay off on a large program and several cpus
+  def __init__(self, jobs=1):
+    self.jobs = jobs
     self.errors = []
     self.program = None
+    self.source = None
+    self.signatures = {}
+    self.hierarchy = None
+    self.order = None
+    self.dependencies = None
 
   def semantic_analysis(self, program):
+    self.begin(program.source)
+    for cl in program.list_class:
+      self.check_class(cl)
+    return self.finish(program)
+
+  # Pipelined analysis: begin(), add_class() on each class as soon as it is
+  # parsed, then finish() with the whole program. Errors and tree are those
+  # of semantic_analysis(), only the work on each class is done earlier.
+  # source is the SourceFile of the program, that positions the errors.
+  def begin(self, source=None):
     self.errors = []
+    self.program = None
+    self.source = source
+    self.signatures = {}
+    self.hierarchy = None
+    self.order = None
+    # A set gets the classes the 4th pass of a class names: the types of its
+    # fields, formals, returns, lets and news, the ones it dispatches on
+    self.dependencies = None
+    self.defined_classes = {"Object": self.create_object_class()}
+    self.is_main_class = False
+    self.is_main_method = False
+
+  def add_class(self, cl):
+    self.check_class(cl)
+    # Checks of the 3rd pass that only need the class itself, the rest
+    # waits for every class to be known
+    self.signatures[cl] = (self.fields_signature(cl), self.methods_signature(cl))
+
+  def finish(self, program):
     self.program = program
-    
 
     #check_redefine_and_main_function and change list_class to a dic
     self.check_redefine_and_main()
@@ -47,6 +270,8 @@ class VsopSem:
       #if ok check inheritance loop
       self.check_inheritance()
     if(not self.errors):
+      #index the hierarchy for the type checks
+      self.hierarchy = ClassHierarchy(self.program.list_class, self.order)
       #if ok check if fields and method are ok (not the type) 
       #if sem is ok, transform fields and methods array to dic
       #finnaly add inhe field and inhe methods which are also dic
@@ -55,181 +280,209 @@ class VsopSem:
       #check type of all and check if express are ok
       self.check_fields_and_methods_type()
 
+    self.signatures = {}
     return self.program, self.errors
 
   # 1PASSE
-  def check_redefine_and_main(self):
+  def check_class(self, cl):
     # check redefine
-    cl_object = self.create_object_class()
-    defined_classes = {"Object": cl_object}
-    is_main_class=False
-    is_main_method=False 
-    for cl in self.program.list_class:
-      if cl.name in defined_classes:
-        self.errors.append(SemError(f"Class {cl.name} already defined", line=cl.lineno, column=cl.column))
-      else:
-        defined_classes[cl.name] = cl
-      # check main
-      if cl.name == "Main":
-        is_main_class = True
-        for method in cl.methods:
-          if method.name == "main":
-            is_main_method = True
-            if len(method.formals) != 0 :
-              self.errors.append(SemError(f"main method should not have argument", line=method.lineno, column=method.column))
-            if method.ret_type != "int32":
-              self.errors.append(SemError(f"main method should have return type int32", line=method.lineno, column=method.column))
-
-    if not is_main_class :
+    if cl.name in self.defined_classes:
+      self.errors.append(SemError(f"Class {cl.name} already defined", *self.class_position(cl)))
+    else:
+      self.defined_classes[cl.name] = cl
+    # check main
+    if cl.name == "Main":
+      self.is_main_class = True
+      for method in cl.methods:
+        if method.name == "main":
+          self.is_main_method = True
+          if len(method.formals) != 0 :
+            self.errors.append(SemError(f"main method should not have argument", *self.position(method.offset)))
+          if method.ret_type != "int32":
+            self.errors.append(SemError(f"main method should have return type int32", *self.position(method.offset)))
+
+  def check_redefine_and_main(self):
+    if not self.is_main_class :
       self.errors.append(SemError(f"Main class is missing", line=1, column=1))
-    elif not is_main_method:
+    elif not self.is_main_method:
       self.errors.append(SemError(f"main method in Main class is missing", line=1, column=1))
     
-    self.program.list_class = defined_classes
+    self.program.list_class = self.defined_classes
 
   def create_object_class(self):
     methods=[]
-    methods.append(Method('print', [Formal('s','string',0,0)], 'Object',0,0,Block([],0,0)))
-    methods.append(Method('printBool', [Formal('b','bool',0,0)],'Object',0,0,Block([],0,0)))
-    methods.append(Method('printInt32', [Formal('i','int32',0,0)],'Object',0,0,Block([],0,0)))
-    methods.append(Method('inputLine',[],'string',0,0,Block([],0,0)))
-    methods.append(Method('inputBool',[],'bool',0,0,Block([],0,0)))
-    methods.append(Method('inputInt32',[],'int32',0,0,Block([],0,0)))
-    return Class('Object',None,methods,0,0,None)
+    methods.append(Method('print', [Formal('s','string',None)], 'Object',None,Block([],None)))
+    methods.append(Method('printBool', [Formal('b','bool',None)],'Object',None,Block([],None)))
+    methods.append(Method('printInt32', [Formal('i','int32',None)],'Object',None,Block([],None)))
+    methods.append(Method('inputLine',[],'string',None,Block([],None)))
+    methods.append(Method('inputBool',[],'bool',None,Block([],None)))
+    methods.append(Method('inputInt32',[],'int32',None,Block([],None)))
+    return Class('Object',None,methods,None,None,None)
+
+  def position(self, offset):
+    # (line, column) of an offset, only looked up for an error
+    if self.source is None:
+      return None, None
+    return self.source.position(offset)
+
+  def class_position(self, cl):
+    # The line of the 'class' keyword and the column of the name
+    return self.position(cl.offset)[0], self.position(cl.name_offset)[1]
   
   #2 PASSE
   def check_inheritance(self):
-    
-    class_checked = []
-    for key,cl in self.program.list_class.items():
-      child_name = cl.name
-      parent_name = cl.parent
-      already_seen = [child_name]
-
-      while True:
-        if child_name=="Object":
-          break
-        if parent_name in class_checked or parent_name == "Object":
-          for cl_seen in already_seen:
-            class_checked.append(cl_seen)
-          break
-        elif parent_name in already_seen:
-          self.errors.append(SemError(f"class {cl.name} cannot extend child class {cl.parent}, there is a loop.", line=cl.lineno, column=cl.column))
-          break
-        if parent_name not in self.program.list_class:
-          self.errors.append(SemError(f"class {parent_name} not defined", line=cl.parent_lineno, column=cl.parent_column))
+    # Walks up from each class to a class whose end is known: Object, the
+    # name of a parent not defined, or a loop. Classes on the walk are
+    # marked, meeting one again is a loop. Every class of the walk ends as
+    # it does, each class reports the error of its own end. self.order gets
+    # the classes that end on Object, each after its parent
+    classes = self.program.list_class
+    walking = object()
+    looping = object()
+    ends = {"Object": None}
+    self.order = ["Object"]
+    for key,cl in classes.items():
+      chain = []
+      name = cl.name
+      while name not in ends:
+        ends[name] = walking
+        chain.append(name)
+        name = classes[name].parent
+        if name not in classes:
+          end = name
           break
-        else:
-          child_name = parent_name
-          parent_name = self.program.list_class[parent_name].parent
-          already_seen.append(child_name)
+      else:
+        end = ends[name]
+        if end is walking:
+          end = looping
+      for name in chain:
+        ends[name] = end
+      if end is None:
+        self.order.extend(reversed(chain))
+      elif end is looping:
+        self.errors.append(SemError(f"class {cl.name} cannot extend child class {cl.parent}, there is a loop.", *self.class_position(cl)))
+      else:
+        self.errors.append(SemError(f"class {end} not defined", *self.position(cl.parent_offset)))
 
 
   #3PASSE
-  def check_and_handle_inheritance_fields_and_methods_loop(self):
+  def check_and_handle_inheritance_fields_and_methods_loop(self, tables=None):
+    # Each class is handled once, after its parent. A class met before its
+    # parent has its own members checked, then those of its unfinished
+    # parents up the chain, before any of them is compared with its parent.
+    # tables has those of the classes already finished, if any
+    self.tables = {} if tables is None else tables
     for key, cl in self.program.list_class.items():
-      self.check_and_handle_inheritance_fields_and_methods(cl)
-      
+      chain = []
+      while cl.inhe_methods is None or cl.inhe_fields is None:
+        self.check_fields_and_method(cl)
+        chain.append(cl)
+        if cl.parent is None:
+          break
+        cl = self.program.list_class[cl.parent]
+      for cl in reversed(chain):
+        self.check_and_handle_inheritance_fields_and_methods(cl)
+    self.tables = {}
 
   def check_and_handle_inheritance_fields_and_methods(self,cl):
+    # The tables of the parent are done, the ones of cl share them
     if cl.parent == None:
-      if(cl.inhe_fields==None or cl.inhe_methods == None):
-        self.check_fields_and_method(cl)
-        #Seems not useful but is used as a flag to not perform check_fields_and_methods twice
-        cl.inhe_fields={}
-        cl.inhe_methods={}
-      return copy.deepcopy(cl.methods),{},["Object"]
-    else:
-      
-      if(cl.inhe_methods == None or cl.inhe_fields == None):
-        self.check_fields_and_method(cl) 
-        inhe_methods, inhe_fields,cl.all_parents=self.check_and_handle_inheritance_fields_and_methods(self.program.list_class[cl.parent])
-        #check field with same name then add inhe fields to the class.
-        if(cl.fields):
-          for key,field in cl.fields.items():
-            if field.name in inhe_fields:
-              self.errors.append(SemError(f"field name \"{field.name}\" of class \"{cl.name}\" is already used in one of its parent class ", line=field.lineno, column=field.column))
-              del inhe_fields[field.name]
-        cl.inhe_fields=inhe_fields
-
-        #check redef method add inhe methods to the class.
-
-        if(cl.methods):
-          for key,method in cl.methods.items():
-            if method.name in inhe_methods:
-              if len(method.formals) != len(inhe_methods[method.name].formals):
-                self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same number of formal(s) than the parent class method", line=method.lineno, column=method.column))
-                
-              elif method.ret_type != inhe_methods[method.name].ret_type:
-                self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same return type than the parent class method", line=method.lineno, column=method.column))
-                
-              else:
-                for key,formal in inhe_methods[method.name].formals.items():
-                  if formal.name not in method.formals:
-                    self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same formal(s) than the parent class method", line=method.lineno, column=method.column))
-                   
-                  elif formal.type != method.formals[formal.name].type:
-                    self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same formal(s) than the parent class method", line=method.lineno, column=method.column))
-                    
-                  #if all ok then keeps tracks of redef method to supress then before sending to the child class prevent 2 same class in inhe_method of child
-        cl.inhe_methods=inhe_methods
+      cl.inhe_fields = Members()
+      cl.inhe_methods = Members()
+      #Object gives its methods to its children, not its fields
+      self.tables[cl.name] = Members(), Members().including(cl.methods)
+      return
+    inhe_fields, inhe_methods = self.tables[cl.parent]
 
-      
-      methods_for_child=cl.inhe_methods.copy()
-      #With updaten if there is a redefinition it's the parent method which is given to the child not the redefinition
-      methods_for_child.update(cl.methods)
+    #check field with same name then add inhe fields to the class.
+    if(cl.fields):
+      for key,field in cl.fields.items():
+        if field.name in inhe_fields:
+          self.errors.append(SemError(f"field name \"{field.name}\" of class \"{cl.name}\" is already used in one of its parent class ", *self.position(field.offset)))
+    cl.inhe_fields=inhe_fields
 
-      fields_for_child=cl.inhe_fields.copy()
-      
-      fields_for_child.update(cl.fields)
+    #check redef method add inhe methods to the class.
+    if(cl.methods):
+      for key,method in cl.methods.items():
+        if method.name in inhe_methods:
+          if len(method.formals) != len(inhe_methods[method.name].formals):
+            self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same number of formal(s) than the parent class method", *self.position(method.offset)))
+            
+          elif method.ret_type != inhe_methods[method.name].ret_type:
+            self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same return type than the parent class method", *self.position(method.offset)))
+            
+          else:
+            for key,formal in inhe_methods[method.name].formals.items():
+              if formal.name not in method.formals:
+                self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same formal(s) than the parent class method", *self.position(method.offset)))
+               
+              elif formal.type != method.formals[formal.name].type:
+                self.errors.append(SemError(f"redefinition of method name \"{method.name}\" of class \"{cl.name}\" must have the same formal(s) than the parent class method", *self.position(method.offset)))
+    cl.inhe_methods=inhe_methods
 
-      all_parents_for_child = copy.deepcopy(cl.all_parents)
-      all_parents_for_child.append(cl.name)
-      return methods_for_child, fields_for_child, all_parents_for_child
+    #The tables of the children: the members of cl over the inherited ones
+    self.tables[cl.name] = inhe_fields.including(cl.fields), inhe_methods.including(cl.methods)
 
 
   def check_fields_and_method(self,cl):
-      self.check_fields(cl)
-      self.check_methods(cl)
+      fields, methods = self.signatures.pop(cl, None) or \
+        (self.fields_signature(cl), self.methods_signature(cl))
+      self.check_fields(cl, *fields)
+      self.check_methods(cl, *methods)
 
-  def check_fields(self, cl):
+  def check_type_exists(self, checks):
+      # checks are (type, message, offset) in order, the error is kept if
+      # type is None or is neither primitive nor a class
+      for type, message, offset in checks:
+        if type is None:
+          self.errors.append(SemError(message, *self.position(offset)))
+        #check if type is primitive or Class
+        elif type in primitive_types:
+          pass
+        elif type in self.program.list_class:
+          pass
+        else:
+          self.errors.append(SemError(message, *self.position(offset)))
+
+  def check_fields(self, cl, fields, checks):
+      self.check_type_exists(checks)
+      #transform into a dico
+      cl.fields=fields
+
+  def fields_signature(self, cl):
       fields_already_seen={}
+      checks=[]
       if(cl.fields):
         for field in cl.fields:
           #check if field = self
           if(field.name == 'self'):
-            self.errors.append(SemError(f"a field named \"self\" is forbidden", line=field.lineno, column=field.column))
+            checks.append((None, f"a field named \"self\" is forbidden", field.offset))
             
           else:
               #check redefinition of field
               if(field.name in fields_already_seen):
-                self.errors.append(SemError(f"redefinition of field \"{field.name}\", first defined at {fields_already_seen[field.name].lineno}:{fields_already_seen[field.name].column} """, line=field.lineno, column=field.column))
+                first_line, first_column = self.position(fields_already_seen[field.name].offset)
+                checks.append((None, f"redefinition of field \"{field.name}\", first defined at {first_line}:{first_column} """, field.offset))
               else:
                 fields_already_seen[field.name] = field
+                checks.append((field.type, f"the type of field \"{field.name}\" is {field.type} which does not exist. ", field.offset))
+      return fields_already_seen, checks
 
-                #check if type is primitive or Class
-                if field.type == "unit" or field.type == "bool" or field.type == "int32" or field.type == "string":
-                  pass
-                elif field.type in self.program.list_class:
-                  pass
-                else:
-                  self.errors.append(SemError(f"the type of field \"{field.name}\" is {field.type} which does not exist. ", line=field.lineno, column=field.column))
-      
-      #transform into a dico
-      cl.fields=fields_already_seen     
-      
-           
-            
-
-          
+  def check_methods(self, cl, methods, formals, checks):
+      self.check_type_exists(checks)
+      for method, formal_already_seen in formals:
+        method.formals=formal_already_seen
+      cl.methods=methods
 
-  def check_methods(self, cl):
+  def methods_signature(self, cl):
       method_already_seen={}
+      formals=[]
+      checks=[]
       if(cl.methods):
         #check if multiple methods with the same name
         for method in cl.methods:
           if method.name in method_already_seen:
-             self.errors.append(SemError(f"the method name \"{method.name}\" is used multiple times in the class \"{cl.name}\"", line=method.lineno, column=method.column))
+             checks.append((None, f"the method name \"{method.name}\" is used multiple times in the class \"{cl.name}\"", method.offset))
           else:
             method_already_seen[method.name] = method
             
@@ -237,419 +490,620 @@ class VsopSem:
             for formal in method.formals:
               #check if multiple formals with the same name
               if formal.name in formal_already_seen:
-                self.errors.append(SemError(f"the formal name \"{formal.name}\"  is used multiple times in the method \"{method.name}\"", line=formal.lineno, column=formal.column))
+                checks.append((None, f"the formal name \"{formal.name}\"  is used multiple times in the method \"{method.name}\"", formal.offset))
               else: 
                 formal_already_seen[formal.name] = formal
-
-              #check if type is primitive or Class
-              if formal.type == "unit" or formal.type == "bool" or formal.type == "int32" or formal.type == "string":
-                pass
-              elif formal.type in self.program.list_class:
-                pass
-              else:
-                self.errors.append(SemError(f"the type of formal \"{formal.name}\" is {formal.type} which does not exist. ", line=formal.lineno, column=formal.column))
+              checks.append((formal.type, f"the type of formal \"{formal.name}\" is {formal.type} which does not exist. ", formal.offset))
             
-            method.formals=formal_already_seen
-            if method.ret_type == "unit" or method.ret_type == "bool" or method.ret_type == "int32" or method.ret_type == "string":
-              pass
-            elif method.ret_type in self.program.list_class:
-              pass
-            else:
-              self.errors.append(SemError(f"the return type of method \"{method.name}\" is {method.ret_type} which does not exist. ", line=method.lineno, column=method.column))
-      
-      cl.methods=method_already_seen          
+            formals.append((method, formal_already_seen))
+            checks.append((method.ret_type, f"the return type of method \"{method.name}\" is {method.ret_type} which does not exist. ", method.offset))
+      return method_already_seen, formals, checks
 
 
 
   #4 passe
   def check_fields_and_methods_type(self):
+    if self.jobs > 1:
+      return self.check_fields_and_methods_type_in_workers()
     for key,cl in self.program.list_class.items():
-      self.check_field_type(cl)
-      if cl.name != "Object":
-        self.check_method_type_and_body(cl)
+      self.check_class_type(cl)
+
+  def check_class_type(self, cl):
+    self.check_field_type(cl)
+    if cl.name != "Object":
+      self.check_method_type_and_body(cl)
+
+  def check_fields_and_methods_type_in_workers(self):
+    # The classes are independent now, they are sharded over the workers.
+    # Static types are put back on the nodes of each shard as soon as it is
+    # done, while the workers go on with the others. Errors are merged in
+    # class order, as the serial pass gives them
+    global worker_sem
+    names = list(self.program.list_class)
+    shards = [names[i::4 * self.jobs] for i in range(min(len(names), 4 * self.jobs))]
+    results = {}
+    if "fork" in multiprocessing.get_all_start_methods():
+      # Forked workers share this analyser and its program as they are now
+      worker_sem = self
+      pool = ProcessPoolExecutor(self.jobs, multiprocessing.get_context("fork"))
+    else:
+      snapshot = io.BytesIO()
+      dump(self.program, snapshot)
+      pool = ProcessPoolExecutor(self.jobs, initializer=start_worker,
+        initargs=(snapshot.getvalue(),))
+    try:
+      with pool:
+        futures = {pool.submit(check_in_worker, shard) : shard for shard in shards}
+        for future in as_completed(futures):
+          for name, (errors, types, failure) in zip(futures[future], future.result()):
+            results[name] = errors, failure
+            for express, static_type in zip(class_expressions(self.program.list_class[name]), types):
+              if static_type is not None:
+                express.static_type = static_type
+    finally:
+      worker_sem = None
+    for name in names:
+      errors, failure = results[name]
+      if failure is not None:
+        # Raised where the serial pass would have raised it
+        raise failure
+      self.errors.extend(errors)
 
   def check_field_type(self,cl):
     for key,field in cl.fields.items():
+      self.depends_on(field.type)
     #check if init_expr have the right type
       if field.init_expr:
-        express_type=self.check_expression(field.init_expr,cl)
-        if isinstance(express_type, str):
-          if field.type != express_type:
-            self.errors.append(SemError(f"the field {field.name} is assigned to a type {express_type} instead of a type {field.type}", line=field.lineno, column=field.column))
+        express_type=self.check_expression(field.init_expr, Scope(cl))
+        #primitive or error type
+        if type(express_type) is Type:
+          if express_type is not type_named(field.type):
+            self.errors.append(SemError(f"the field {field.name} is assigned to a type {express_type} instead of a type {field.type}", *self.position(field.offset)))
         else:
-          if not field.type in express_type:
-            self.errors.append(SemError(f"the field {field.name} is not assigned to type {field.type}", line=field.lineno, column=field.column))
+          if not self.hierarchy.is_subtype(express_type.name, field.type):
+            self.errors.append(SemError(f"the field {field.name} is not assigned to type {field.type}", *self.position(field.offset)))
   
   def check_method_type_and_body(self,cl):
     for key,method in cl.methods.items():
-      body_type = self.check_expression(method.block,cl,method.formals)
-      if isinstance(body_type,list):
-        if not method.ret_type in body_type:
-          self.errors.append(SemError(f"return type of method {method.name} is not the same as the body return type", line=method.lineno, column=method.column))
-      elif body_type != method.ret_type:
-          self.errors.append(SemError(f"return type of method {method.name} is not the same as the body return type", line=method.lineno, column=method.column))
-
-  def check_expression(self, express, cl, formals={}, local_vars={}):
-    # == LITERAL ==
-    if isinstance(express, Literal):
-      if isinstance(express.literal, Literal):
-        if express.literal.literal == "true" or express.literal.literal == "false":
-          return "bool"
-
-      elif isinstance(express.literal, str):
-        if express.literal == "()":
-          return "unit"
-        elif express.literal[0] == '"' and express.literal[-1]=='"':
-          return "string"
-
-      elif isinstance(express.literal, int):
-        if(express.literal<-2147483648 or express.literal>2147483647):
-          self.errors.append(SemError(f"literal is too big, int32 should be represent as a 32-bit signed integers", line=express.lineno, column=express.column))
-          return "error"
-        return "int32"
+      self.depends_on(method.ret_type)
+      for formal in method.formals.values():
+        self.depends_on(formal.type)
+      body_type = self.check_expression(method.block, Scope(cl, method.formals))
+      if isinstance(body_type, ClassType):
+        if not self.hierarchy.is_subtype(body_type.name, method.ret_type):
+          self.errors.append(SemError(f"return type of method {method.name} is not the same as the body return type", *self.position(method.offset)))
+      elif body_type is not type_named(method.ret_type):
+          self.errors.append(SemError(f"return type of method {method.name} is not the same as the body return type", *self.position(method.offset)))
 
+  def check_expression(self, express, scope):
+    # The type of an expression, given by the visit_ method of its node
+    # class through the dispatch table, and kept on the node as its
+    # static_type. A visit_ method of a node with subexpressions is a
+    # generator: it yields each subexpression to check and is sent back its
+    # type, then returns the type of its node. The visits in progress wait on
+    # an explicit stack, so the depth of an expression costs no recursion.
+    dispatch = self.dispatch
+    visits = []
+    while True:
+      express_type = dispatch[type(express)](self, express, scope)
+      if type(express_type) is GeneratorType:
+        visits.append((express_type, express))
+        express_type = None
       else:
-        self.errors.append(SemError(f"unknown literal", line=express.lineno, column=express.column))
-        return "error"
-
-    # == OBJECT IDENTIFIER ==
-    if isinstance(express, Object_identifier):
-      var_not_found = True
-
-      #Check if is in local variable
-      if local_vars and var_not_found:
-        if express.name in local_vars:
-          var_not_found=False
-          if local_vars[express.name].type == "unit" or local_vars[express.name].type == "bool" or local_vars[express.name].type == "int32" or local_vars[express.name].type == "string":
-            return local_vars[express.name].type
-          #It's a class type
-          else:
-            #Possible type for a class type is its class type + parent class type
-            possible_class_type=copy.deepcopy(self.program.list_class[local_vars[express.name].type].all_parents)
-            possible_class_type.append(local_vars[express.name].type)
-            return possible_class_type
-
-      #Check if is in formals
-      if formals and var_not_found:
-        if express.name in formals:
-          var_not_found=False
-          if formals[express.name].type == "unit" or formals[express.name].type == "bool" or formals[express.name].type == "int32" or formals[express.name].type == "string":
-            return formals[express.name].type
-          #It's a class type
-          else:
-            #Possible type for a class type is its class type + parent class type
-            possible_class_type=copy.deepcopy(self.program.list_class[formals[express.name].type].all_parents)
-            possible_class_type.append(formals[express.name].type)
-            return possible_class_type
+        express.static_type = express_type
+      # Sends the type to the innermost visit, until one yields
+      while visits:
+        visit, node = visits[-1]
+        try:
+          express = visit.send(express_type)
+          break
+        except StopIteration as done:
+          visits.pop()
+          node.static_type = express_type = done.value
+      else:
+        return express_type
 
-      #Check if is in fields
-      if cl.fields and var_not_found:
-        
-        if express.name in cl.fields:
-          var_not_found=False
-          if cl.fields[express.name].type == "unit" or cl.fields[express.name].type == "bool" or cl.fields[express.name].type == "int32" or cl.fields[express.name].type == "string":
-            return cl.fields[express.name].type
-          #It's a class type
-          else:
-            #Possible type for a class type is its class type + parent class type
-            possible_class_type=copy.deepcopy(self.program.list_class[cl.fields[express.name].type].all_parents)
-            possible_class_type.append(cl.fields[express.name].type)
-            return possible_class_type
-
-      #Check if is in inhe fields
-      if cl.inhe_fields and var_not_found:
-        if express.name in cl.inhe_fields:
-          var_not_found=False
-          if cl.inhe_fields[express.name].type == "unit" or cl.inhe_fields[express.name].type == "bool" or cl.inhe_fields[express.name].type == "int32" or cl.inhe_fields[express.name].type == "string":
-            return cl.inhe_fields[express.name].type
-          #It's a class type
-          else:
-            #Possible type for a class type is its class type + parent class type
-            possible_class_type=copy.deepcopy(self.program.list_class[cl.inhe_fields[express.name].type].all_parents)
-            possible_class_type.append(cl.inhe_fields[express.name].type)
-            return possible_class_type
-      
-      if var_not_found:
-        self.errors.append(SemError(f"{express.name} is not defined", line=express.lineno, column=express.column))
-        return "error"
-
-    # == BINOP ==
-    if isinstance(express, BinOp):
-      if express.op == "+" or express.op == "-"  or express.op == "*"  or express.op == "/" or express.op == "^":
-        if self.check_expression(express.left_expr,cl,formals,local_vars) != "int32" or self.check_expression(express.right_expr,cl,formals,local_vars) != "int32":
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type int32', line=express.lineno, column=express.column))
-          return "error"
-        return "int32"
-      if express.op == "<=" or express.op == "<":
-        if self.check_expression(express.left_expr,cl,formals,local_vars) != "int32" or self.check_expression(express.right_expr,cl,formals,local_vars) != "int32":
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type int32', line=express.lineno, column=express.column))
-          return "error"
-        return "bool"
-      if express.op == "=":
-        left_type = self.check_expression(express.left_expr,cl,formals,local_vars)
-        right_type = self.check_expression(express.right_expr,cl,formals,local_vars)
-        if isinstance(left_type, list) and isinstance(right_type, list) :
-          #both are class type so its ok
-          return "bool"
-        elif left_type == "error" or right_type == "error" or left_type != right_type: 
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only between expression of the same type', line=express.lineno, column=express.column))
-          return "error"
-        return "bool"
-      if express.op == "and":
-        if self.check_expression(express.left_expr,cl,formals,local_vars) != "bool" or self.check_expression(express.right_expr,cl,formals,local_vars) != "bool":
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type boolean', line=express.lineno, column=express.column))
-          return "error"
-        return "bool"
-
-    # == UNOP ==
-    if isinstance(express, UnOp):
-      if express.op == "not":
-        if self.check_expression(express.expr,cl,formals,local_vars) != "bool":
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only on type boolean', line=express.lineno, column=express.column))
-          return "error"
-        return "bool"
-      if express.op == "-":
-        if self.check_expression(express.expr,cl,formals,local_vars) != "int32":
-          self.errors.append(SemError(f'operation \"{express.op}\" can be done only on type int32', line=express.lineno, column=express.column))
-          return "error"
-        return "int32"
-
-    # == NEW ==
-    if isinstance(express, New):
-      possible_class_type=copy.deepcopy(self.program.list_class[express.type_name].all_parents)
-      possible_class_type.append(express.type_name)
-      return possible_class_type
-    # == ASSIGN ==
-    if isinstance(express, Assign):
-      if express.id.name == "self":
-        self.errors.append(SemError(f'cannot assign to self', line=express.lineno, column=express.column))
-        return "error"
-
-      id_type = self.check_expression(express.id,cl,formals,local_vars)
-      if isinstance(id_type, list):
-        id_type=id_type[-1]
-      express_type = self.check_expression(express.expr,cl,formals,local_vars)
-      if isinstance(express_type, list):
-        if not id_type in express_type:
-          self.errors.append(SemError(f'{express.id.name} is not assign to a type {id_type}', line=express.lineno, column=express.column))
-          return "error"
-        return "unit"
+  def class_type(self, name):
+    return type_named(self.program.list_class[name].name)
+
+  def depends_on(self, name):
+    if self.dependencies is not None:
+      self.dependencies.add(name)
+
+  # == LITERAL ==
+  def visit_Literal(self, express, scope):
+    if isinstance(express.literal, Literal):
+      if express.literal.literal == "true" or express.literal.literal == "false":
+        return bool_type
+
+    elif isinstance(express.literal, str):
+      if express.literal == "()":
+        return unit_type
+      elif express.literal[0] == '"' and express.literal[-1]=='"':
+        return string_type
+
+    elif isinstance(express.literal, int):
+      if(express.literal<-2147483648 or express.literal>2147483647):
+        self.errors.append(SemError(f"literal is too big, int32 should be represent as a 32-bit signed integers", *self.position(express.offset)))
+        return error_type
+      return int32_type
+
+    else:
+      self.errors.append(SemError(f"unknown literal", *self.position(express.offset)))
+      return error_type
+
+  # == OBJECT IDENTIFIER ==
+  def visit_Object_identifier(self, express, scope):
+    var = scope.lookup(express.name)
+    if var is None:
+      self.errors.append(SemError(f"{express.name} is not defined", *self.position(express.offset)))
+      return error_type
+    if var.type in primitive_types:
+      return type_named(var.type)
+    return self.class_type(var.type)
+
+  # == BINOP ==
+  def visit_BinOp(self, express, scope):
+    if express.op == "+" or express.op == "-"  or express.op == "*"  or express.op == "/" or express.op == "^":
+      if (yield express.left_expr) is not int32_type or (yield express.right_expr) is not int32_type:
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type int32', *self.position(express.offset)))
+        return error_type
+      return int32_type
+    if express.op == "<=" or express.op == "<":
+      if (yield express.left_expr) is not int32_type or (yield express.right_expr) is not int32_type:
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type int32', *self.position(express.offset)))
+        return error_type
+      return bool_type
+    if express.op == "=":
+      left_type = (yield express.left_expr)
+      right_type = (yield express.right_expr)
+      if isinstance(left_type, ClassType) and isinstance(right_type, ClassType) :
+        #both are class type so its ok
+        return bool_type
+      elif left_type is error_type or right_type is error_type or left_type is not right_type: 
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only between expression of the same type', *self.position(express.offset)))
+        return error_type
+      return bool_type
+    if express.op == "and":
+      if (yield express.left_expr) is not bool_type or (yield express.right_expr) is not bool_type:
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only between type boolean', *self.position(express.offset)))
+        return error_type
+      return bool_type
+
+  # == UNOP ==
+  def visit_UnOp(self, express, scope):
+    if express.op == "not":
+      if (yield express.expr) is not bool_type:
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only on type boolean', *self.position(express.offset)))
+        return error_type
+      return bool_type
+    if express.op == "-":
+      if (yield express.expr) is not int32_type:
+        self.errors.append(SemError(f'operation \"{express.op}\" can be done only on type int32', *self.position(express.offset)))
+        return error_type
+      return int32_type
+
+  # == NEW ==
+  def visit_New(self, express, scope):
+    self.depends_on(express.type_name)
+    return self.class_type(express.type_name)
+  # == ASSIGN ==
+  def visit_Assign(self, express, scope):
+    if express.id.name == "self":
+      self.errors.append(SemError(f'cannot assign to self', *self.position(express.offset)))
+      return error_type
+
+    id_type = (yield express.id)
+    express_type = (yield express.expr)
+    if isinstance(express_type, ClassType):
+      if not self.hierarchy.is_subtype(express_type.name, id_type.name):
+        self.errors.append(SemError(f'{express.id.name} is not assign to a type {id_type}', *self.position(express.offset)))
+        return error_type
+      return unit_type
+    else:
+      if id_type is not express_type:
+        self.errors.append(SemError(f'{express.id.name} is not assign to a type {id_type}', *self.position(express.offset)))
+        return error_type
+      return unit_type
+
+  # == CALL ==
+  def visit_Call(self, express, scope):
+    #SELF
+    
+    if express.obj_expr == "self" or (isinstance(express.obj_expr, Object_identifier) and express.obj_expr.name == "self"):
+      #check if is in its own methods
+      if express.method_name in scope.cl.methods:
+        if len(express.arg) != len (scope.cl.methods[express.method_name].formals):
+          self.errors.append(SemError(f'number of argument does not match', *self.position(express.offset)))
+          return error_type
+        else:
+          #check argument type ok with formal
+          i=0
+          for key,formal in scope.cl.methods[express.method_name].formals.items():
+            arg_type = (yield express.arg[i])
+            if type(arg_type) is Type:
+              if arg_type is not type_named(formal.type):
+                self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                return error_type
+            elif not self.hierarchy.is_subtype(arg_type.name, formal.type):
+              self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+              return error_type
+            
+            i+=1
+          
+          return type_named(scope.cl.methods[express.method_name].ret_type)
+
+      #else check in inhe methods
+      elif express.method_name in scope.cl.inhe_methods:
+        if len(express.arg) != len (scope.cl.inhe_methods[express.method_name].formals):
+          self.errors.append(SemError(f'number of argument does not match', *self.position(express.offset)))
+          return error_type
+        else:
+          #check argument type ok with formal
+          i=0
+          for key,formal in scope.cl.inhe_methods[express.method_name].formals.items():
+            arg_type = (yield express.arg[i])
+            if type(arg_type) is Type:
+              if arg_type is not type_named(formal.type):
+                self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                return error_type
+            elif not self.hierarchy.is_subtype(arg_type.name, formal.type):
+              self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+              return error_type
+            i+=1
+
+          return type_named(scope.cl.inhe_methods[express.method_name].ret_type)
       else:
-        if id_type != express_type:
-          self.errors.append(SemError(f'{express.id.name} is not assign to a type {id_type}', line=express.lineno, column=express.column))
-          return "error"
-        return "unit"
-
-    # == CALL ==
-    if isinstance(express, Call):
-      #SELF
+        self.errors.append(SemError(f'Unknown method', *self.position(express.offset)))
+        return error_type
+    
+    #NOT SELF
+    else:
       
-      if express.obj_expr == "self" or (isinstance(express.obj_expr, Object_identifier) and express.obj_expr.name == "self"):
-        #check if is in its own methods
-        if express.method_name in cl.methods:
-          if len(express.arg) != len (cl.methods[express.method_name].formals):
-            self.errors.append(SemError(f'number of argument does not match', line=express.lineno, column=express.column))
-            return "error"
+      object_type=(yield express.obj_expr)
+      if not isinstance(object_type, ClassType):
+        self.errors.append(SemError(f'dispatch is not use on a class object', *self.position(express.offset)))
+        return error_type
+      else:
+        object_type=object_type.name
+        self.depends_on(object_type)
+        #check in its methods
+        if express.method_name in self.program.list_class[object_type].methods:
+          if len(express.arg) != len (self.program.list_class[object_type].methods[express.method_name].formals):
+            self.errors.append(SemError(f'number of argument does not match', *self.position(express.offset)))
+            return error_type
           else:
             #check argument type ok with formal
             i=0
-            for key,formal in cl.methods[express.method_name].formals.items():
-              arg_type = self.check_expression(express.arg[i],cl,formals,local_vars)
-              if isinstance(arg_type, str):
-                if arg_type != formal.type:
-                  self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                  return "error"
-              elif not formal.type in arg_type:
-                self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                return "error"
+            for key,formal in self.program.list_class[object_type].methods[express.method_name].formals.items():
+              arg_type = (yield express.arg[i])
+              if type(arg_type) is Type:
+                if arg_type is not type_named(formal.type):
+                  self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                  return error_type
+              elif not self.hierarchy.is_subtype(arg_type.name, formal.type):
+                self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                return error_type
               
               i+=1
             
-            if cl.methods[express.method_name].ret_type in self.program.list_class:
-              possible_class_type=copy.deepcopy(self.program.list_class[cl.methods[express.method_name].ret_type].all_parents)
-              possible_class_type.append(cl.methods[express.method_name].ret_type)
-              return possible_class_type
-            else:
-              return cl.methods[express.method_name].ret_type
-
-        #else check in inhe methods
-        elif express.method_name in cl.inhe_methods:
-          if len(express.arg) != len (cl.inhe_methods[express.method_name].formals):
-            self.errors.append(SemError(f'number of argument does not match', line=express.lineno, column=express.column))
-            return "error"
+            return type_named(self.program.list_class[object_type].methods[express.method_name].ret_type)
+        
+        #check in its inhe methods
+        elif express.method_name in self.program.list_class[object_type].inhe_methods:
+          if len(express.arg) != len (self.program.list_class[object_type].inhe_methods[express.method_name].formals):
+            self.errors.append(SemError(f'number of argument does not match', *self.position(express.offset)))
+            return error_type
           else:
             #check argument type ok with formal
             i=0
-            for key,formal in cl.inhe_methods[express.method_name].formals.items():
-              arg_type = self.check_expression(express.arg[i],cl,formals,local_vars)
-              if isinstance(arg_type, str):
-                if arg_type != formal.type:
-                  self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                  return "error"
-              elif not formal.type in arg_type:
-                self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                return "error"
+            for key,formal in self.program.list_class[object_type].inhe_methods[express.method_name].formals.items():
+              arg_type = (yield express.arg[i])
+              if type(arg_type) is Type:
+                if arg_type is not type_named(formal.type):
+                  self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                  return error_type
+              elif not self.hierarchy.is_subtype(arg_type.name, formal.type):
+                self.errors.append(SemError(f'{tree_text(express.arg[i])} type does not match', *self.position(express.offset)))
+                return error_type
+              
               i+=1
-
-            if cl.inhe_methods[express.method_name].ret_type in self.program.list_class:
-              possible_class_type=copy.deepcopy(self.program.list_class[cl.inhe_methods[express.method_name].ret_type].all_parents)
-              possible_class_type.append(cl.inhe_methods[express.method_name].ret_type)
-              return possible_class_type
-            else:
-              return cl.inhe_methods[express.method_name].ret_type
+            
+            return type_named(self.program.list_class[object_type].inhe_methods[express.method_name].ret_type)
         else:
-          self.errors.append(SemError(f'Unknown method', line=express.lineno, column=express.column))
-          return "error"
+          self.errors.append(SemError(f'Unknown method', *self.position(express.offset)))
+          return error_type
+  
+  # == BLOCK ==
+  def visit_Block(self, express, scope):
+    for expr in express.block:
+      if expr == express.block[-1]:
+        return (yield expr)
+      (yield expr)
       
-      #NOT SELF
-      else:
-        
-        object_type=self.check_expression(express.obj_expr,cl,formals,local_vars)
-        if not isinstance(object_type, list):
-          self.errors.append(SemError(f'dispatch is not use on a class object', line=express.lineno, column=express.column))
-          return "error"
-        else:
-          #the last cell of the tab is the type of the object, the rest is its parent
-          object_type=object_type[-1]
-          #check in its methods
-          if express.method_name in self.program.list_class[object_type].methods:
-            if len(express.arg) != len (self.program.list_class[object_type].methods[express.method_name].formals):
-              self.errors.append(SemError(f'number of argument does not match', line=express.lineno, column=express.column))
-              return "error"
-            else:
-              #check argument type ok with formal
-              i=0
-              for key,formal in self.program.list_class[object_type].methods[express.method_name].formals.items():
-                arg_type = self.check_expression(express.arg[i],cl,formals,local_vars)
-                if isinstance(arg_type, str):
-                  if arg_type != formal.type:
-                    self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                    return "error"
-                elif not formal.type in arg_type:
-                  self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                  return "error"
-                
-                i+=1
-              
-              if self.program.list_class[object_type].methods[express.method_name].ret_type in self.program.list_class:
-                possible_class_type=copy.deepcopy(self.program.list_class[self.program.list_class[object_type].methods[express.method_name].ret_type].all_parents)
-                possible_class_type.append(self.program.list_class[object_type].methods[express.method_name].ret_type)
-                return possible_class_type
-              else:
-                return self.program.list_class[object_type].methods[express.method_name].ret_type
-          
-          #check in its inhe methods
-          elif express.method_name in self.program.list_class[object_type].inhe_methods:
-            if len(express.arg) != len (self.program.list_class[object_type].inhe_methods[express.method_name].formals):
-              self.errors.append(SemError(f'number of argument does not match', line=express.lineno, column=express.column))
-              return "error"
-            else:
-              #check argument type ok with formal
-              i=0
-              for key,formal in self.program.list_class[object_type].inhe_methods[express.method_name].formals.items():
-                arg_type = self.check_expression(express.arg[i],cl,formals,local_vars)
-                if isinstance(arg_type, str):
-                  if arg_type != formal.type:
-                    self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                    return "error"
-                elif not formal.type in arg_type:
-                  self.errors.append(SemError(f'{express.arg[i]} type does not match', line=express.lineno, column=express.column))
-                  return "error"
-                
-                i+=1
-              
-              if self.program.list_class[object_type].inhe_methods[express.method_name].ret_type in self.program.list_class:
-                possible_class_type=copy.deepcopy(self.program.list_class[self.program.list_class[object_type].inhe_methods[express.method_name].ret_type].all_parents)
-                possible_class_type.append(self.program.list_class[object_type].inhe_methods[express.method_name].ret_type)
-                return possible_class_type
-              else:
-                return self.program.list_class[object_type].inhe_methods[express.method_name].ret_type
-          else:
-            self.errors.append(SemError(f'Unknown method', line=express.lineno, column=express.column))
-            return "error"
-    
-    # == BLOCK ==
-    if isinstance(express, Block):
-      for expr in express.block:
-        if expr == express.block[-1]:
-          return self.check_expression(expr,cl,formals,local_vars)
-        self.check_expression(expr,cl,formals,local_vars)
-        
 
-    # == WHILE ==
-    if isinstance(express, While):
-      if self.check_expression(express.cond_expr,cl,formals,local_vars) != "bool":
-        self.errors.append(SemError(f'the condition of the while is not a boolean', line=express.lineno, column=express.lineno))
-        return "error"
-      self.check_expression(express.body_expr,cl,formals,local_vars)
-      return "unit"
-
-    # == IF ==
-    if isinstance(express, If):
-      if self.check_expression(express.cond_expr,cl,formals,local_vars) != "bool":
-        self.errors.append(SemError(f'the condition of the if is not a boolean', line=express.lineno, column=express.lineno))
-        return "error"
-      if not express.else_expr :
-        return self.check_expression(express.then_expr,cl,formals,local_vars)
+  # == WHILE ==
+  def visit_While(self, express, scope):
+    if (yield express.cond_expr) is not bool_type:
+      self.errors.append(SemError(f'the condition of the while is not a boolean', line=self.position(express.offset)[0], column=self.position(express.offset)[0]))
+      return error_type
+    (yield express.body_expr)
+    return unit_type
+
+  # == IF ==
+  def visit_If(self, express, scope):
+    if (yield express.cond_expr) is not bool_type:
+      self.errors.append(SemError(f'the condition of the if is not a boolean', line=self.position(express.offset)[0], column=self.position(express.offset)[0]))
+      return error_type
+    if not express.else_expr :
+      return (yield express.then_expr)
+    else:
+      else_type=(yield express.else_expr)
+      then_type=(yield express.then_expr)
+
+      #if both are class type
+      if isinstance(else_type, ClassType) and isinstance(then_type, ClassType):
+        #the first common ancestor, Object at worst
+        return type_named(self.hierarchy.lca(else_type.name, then_type.name))
+
+      elif else_type is unit_type or then_type is unit_type:
+        return unit_type
+      
+      elif else_type is not error_type and then_type is not error_type and else_type is then_type:
+        return then_type
       else:
-        else_type=self.check_expression(express.else_expr,cl,formals,local_vars)
-        then_type=self.check_expression(express.then_expr,cl,formals,local_vars)
-
-        #if both are class type
-        if isinstance(else_type, list) and isinstance(then_type, list):
-          #if its a list, its the list of the type class and all its parents in reverse order so
-          #[grand-father,father,class type] so to find first common ancestor you need to reversed the tab
-          #note that object is always in the first cell so the if in the loop is always satisfied 
-          else_type.reverse()
-          for else_class_type in else_type:
-            if else_class_type in then_type:
-              #return the class type plus the parents
-              possible_class_type = copy.deepcopy(self.program.list_class[else_class_type].all_parents)
-              possible_class_type.append(else_class_type)
-              return possible_class_type
-          #this error should never happen but in case of error in the compilers   
-          self.errors.append(SemError(f'Unknown problem with then and else, both are class but does not have common ancestor', line=express.lineno, column=express.lineno))
-          return "error"
-
-        elif else_type == "unit" or then_type == "unit":
-          return "unit"
-        
-        elif else_type != "error" and then_type != "error" and else_type == then_type:
-          return then_type
-        else:
-          self.errors.append(SemError(f'the type of the then expression and else expression should agree or one of them be unit', line=express.lineno, column=express.lineno))
-          return "error"
-    
-    # == LET ==
-    if isinstance(express, Let):
-      #check local var != self
-      if express.local_var.name == 'self':
-        self.errors.append(SemError(f"a local variable named \"self\" is forbidden", line=express.lineno, column=express.column))
-        return "error"
-      #check local var type
-      if express.local_var.type == "unit" or express.local_var.type == "bool" or express.local_var.type == "int32" or express.local_var.type == "string":
-        #check init if exist
-        if express.local_var.init_expr:
-          if express.local_var.type != self.check_expression(express.local_var.init_expr,cl,formals,local_vars):
-              self.errors.append(SemError(f'the value of \"{express.local_var.name}\" is not of type \"{express.local_var.type}\"', line=express.local_var.lineno, column=express.local_var.column))
-              return "error"
-        #All ok check the body
-        new_local_vars=copy.deepcopy(local_vars)
-        new_local_vars[express.local_var.name]=express.local_var
-        return self.check_expression(express.scope_expr,cl,formals,new_local_vars)
-
-      elif express.local_var.type in self.program.list_class:
-        #check ini if exist
-        if express.local_var.init_expr:
-          init_expr_type = self.check_expression(express.init_expr,cl,formals,local_vars)
-          if isinstance(init_expr_type, str) or not express.local_var.type in init_expr_type:
-            self.errors.append(SemError(f'the initial value of \"{express.local_var.name}\" is not of type \"{express.local_var.type}\"', line=express.local_var.lineno, column=express.local_var.column))
-            return "error"
-        #All ok check the body
-        new_local_vars=copy.deepcopy(local_vars)
-        new_local_vars[express.local_vars.name]=express.local_var
-        return self.check_expression(express.scope_expr,cl,formals,new_local_vars)
+        self.errors.append(SemError(f'the type of the then expression and else expression should agree or one of them be unit', line=self.position(express.offset)[0], column=self.position(express.offset)[0]))
+        return error_type
+  
+  # == LET ==
+  def visit_Let(self, express, scope):
+    #check local var != self
+    if express.local_var.name == 'self':
+      self.errors.append(SemError(f"a local variable named \"self\" is forbidden", *self.position(express.offset)))
+      return error_type
+    #check local var type
+    self.depends_on(express.local_var.type)
+    if express.local_var.type in primitive_types:
+      #check init if exist
+      if express.local_var.init_expr:
+        if type_named(express.local_var.type) is not (yield express.local_var.init_expr):
+            self.errors.append(SemError(f'the value of \"{express.local_var.name}\" is not of type \"{express.local_var.type}\"', *self.position(express.local_var.offset)))
+            return error_type
+      #All ok check the body
+      shadowed = scope.bind(express.local_var.name, express.local_var)
+      scope_type = (yield express.scope_expr)
+      scope.unbind(express.local_var.name, shadowed)
+      return scope_type
+
+    elif express.local_var.type in self.program.list_class:
+      #check ini if exist
+      if express.local_var.init_expr:
+        init_expr_type = (yield express.init_expr)
+        if not isinstance(init_expr_type, ClassType) or not self.hierarchy.is_subtype(init_expr_type.name, express.local_var.type):
+          self.errors.append(SemError(f'the initial value of \"{express.local_var.name}\" is not of type \"{express.local_var.type}\"', *self.position(express.local_var.offset)))
+          return error_type
+      #All ok check the body
+      shadowed = scope.bind(express.local_vars.name, express.local_var)
+      scope_type = (yield express.scope_expr)
+      scope.unbind(express.local_var.name, shadowed)
+      return scope_type
+
+    else:
+      self.errors.append(SemError(f"the type of local variable \"{express.local_var.name}\" is {express.local_var.type} which does not exist. ", *self.position(express.local_var.offset)))
+      return error_type
+
+
+### PARALLEL CHECK
 
+# A worker process checks the fields and methods of the classes it is given
+# on a read-only snapshot of the program after the 3rd pass: the classes,
+# their member tables and the source. A forked worker has the one of the
+# parent, else it loads the program from a dump the parent makes.
+worker_sem = None
+
+def start_worker(snapshot):
+  global worker_sem
+  program = load(io.BytesIO(snapshot))
+  worker_sem = VsopSem()
+  worker_sem.begin(program.source)
+  worker_sem.program = program
+  worker_sem.check_inheritance()
+  worker_sem.hierarchy = ClassHierarchy(program.list_class, worker_sem.order)
+
+def check_in_worker(names):
+  # The errors of each class, the static types of its expressions in
+  # class_expressions order (None if not checked) and the exception its
+  # check raised, if any
+  sem = worker_sem
+  checked = []
+  for name in names:
+    cl = sem.program.list_class[name]
+    sem.errors = []
+    failure = None
+    try:
+      sem.check_class_type(cl)
+    except Exception as e:
+      failure = e
+    checked.append((sem.errors, [getattr(express, 'static_type', None)
+      for express in class_expressions(cl)], failure))
+  return checked
+
+def class_expressions(cl):
+  # The expressions of the fields and methods of a class, in the same order
+  # in the parent and in a worker. As walk(), but only through the slots that
+  # can hold a node: this runs on every node of the program in the parent
+  found = []
+  stack = [cl.fields, cl.methods]
+  while stack:
+    value = stack.pop()
+    cls = type(value)
+    if cls is list:
+      stack.extend(value)
+    elif cls is dict:
+      stack.extend(value.values())
+    elif isinstance(value, Node):
+      if isinstance(value, Expression):
+        found.append(value)
+      names = child_slots.get(cls)
+      if names is None:
+        names = child_slots[cls] = tuple(name for name in slot_names(cls)
+          if name not in ('offset', 'static_type'))
+      for name in names:
+        stack.append(getattr(value, name, None))
+  return found
+
+child_slots = {}
+
+### INCREMENTAL CHECK
+
+class SemSession:
+  # Checks successive versions of a program, keeping for each class what its
+  # last check gave: its source span (from its 'class' keyword to the next
+  # one), its signature, its analysed node, the errors of its fields and
+  # methods and the classes its check named (VsopSem.dependencies). When the
+  # classes and their parents are those of the last version, the only classes
+  # checked again are those whose span changed, those whose signature or the
+  # one of an ancestor changed, and those that name one of the latter. The
+  # others keep their node and their errors, moved to their new position.
+  # Any other version is checked whole. Errors are always those of
+  # semantic_analysis(), and so is what it raises.
+  # A class checked again is the node of the given tree, rewritten as by
+  # semantic_analysis(). The others stay the ones of the version they were
+  # checked in, with its offsets, so the given tree is not a result.
+  def __init__(self):
+    self.classes = {}
+    self.tables = {}
+    self.inheritance = None
+    self.hierarchy = None
+    self.object_class = None
+    self.checked = 0
+    self.reused = 0
+
+  def check(self, program):
+    self.checked = self.reused = 0
+    classes = list(program.list_class)
+    source = program.source
+    sem = VsopSem()
+    sem.begin(source)
+    for cl in classes:
+      sem.check_class(cl)
+    sem.program = program
+    sem.check_redefine_and_main()
+    if sem.errors:
+      return sem.errors
+
+    # The 2nd pass only sees the names and parents, they have passed it
+    # if they are the same
+    inheritance = [(cl.name, cl.parent) for cl in classes]
+    if inheritance == self.inheritance and source is not None:
+      known = self.classes
+      tables = dict(self.tables)
+      hierarchy = self.hierarchy
+      object_class = self.object_class
+    else:
+      sem.check_inheritance()
+      if sem.errors:
+        return sem.errors
+      known = {}
+      tables = {}
+      hierarchy = ClassHierarchy(program.list_class, sem.order)
+      object_class = program.list_class["Object"]
+
+    text = source.text if source is not None else None
+    ends = [cl.offset for cl in classes[1:]] + [None]
+    spans = {}
+    signatures = {}
+    renew = set()
+    changed = set()
+    for cl, end in zip(classes, ends):
+      spans[cl.name] = span = text[cl.offset:end] if text is not None else None
+      entry = known.get(cl.name)
+      if entry is not None and entry[0] == span:
+        signatures[cl.name] = entry[1]
+        continue
+      renew.add(cl.name)
+      signatures[cl.name] = signature = self.signature(cl)
+      if entry is None or entry[1] != signature:
+        changed.add(cl.name)
+    if changed:
+      # The descendants of a changed class inherit its members
+      affected = {"Object": False}
+      for cl in classes:
+        chain = []
+        name = cl.name
+        while name not in affected:
+          chain.append(name)
+          name = program.list_class[name].parent
+        hit = affected[name]
+        for name in reversed(chain):
+          hit = hit or name in changed
+          affected[name] = hit
+      changed = {name for name, hit in affected.items() if hit}
+      renew |= changed
+      renew.update(name for name, entry in known.items()
+        if not entry[4].isdisjoint(changed))
+
+    # The 3rd pass only does the classes checked again, the others are
+    # finished with their tables
+    list_class = {"Object": object_class}
+    for cl in classes:
+      list_class[cl.name] = cl if cl.name in renew else known[cl.name][2]
+    sem.program = Program(list_class, source)
+    sem.hierarchy = hierarchy
+    sem.check_and_handle_inheritance_fields_and_methods_loop(tables)
+    if sem.errors:
+      return sem.errors
+
+    # The 4th pass, in class order (Object has nothing to check). Errors
+    # are kept with their offsets from the class
+    errors = []
+    entries = {}
+    for cl in classes:
+      name = cl.name
+      if name in renew:
+        sem.errors = []
+        sem.dependencies = set()
+        sem.source = ClassPositions(cl.offset)
+        sem.check_class_type(cl)
+        entries[name] = spans[name], signatures[name], cl, sem.errors, sem.dependencies
+        self.checked += 1
       else:
-        self.errors.append(SemError(f"the type of local variable \"{express.local_var.name}\" is {express.local_var.type} which does not exist. ", line=express.local_var.lineno, column=express.local_var.column))
-        return "error"
+        entries[name] = known[name]
+        self.reused += 1
+      for error in entries[name][3]:
+        errors.append(SemError(error.message,
+          moved_position(source, error.line, cl.offset),
+          moved_position(source, error.column, cl.offset)))
+
+    self.classes = entries
+    self.tables = tables
+    self.inheritance = inheritance
+    self.hierarchy = hierarchy
+    self.object_class = object_class
+    return errors
+
+  def signature(self, cl):
+    # What the other classes see of cl, its members as parsed
+    return ([(field.name, field.type) for field in cl.fields or ()],
+      [(method.name, method.ret_type, [(formal.name, formal.type) for formal in method.formals])
+        for method in cl.methods or ()])
+
+class ClassPositions():
+  # The source of the analyser while a session checks a class: a position
+  # is kept as (0 for its line or 1 for its column, offset in the class)
+  __slots__ = ('start',)
+
+  def __init__(self, start):
+    self.start = start
+
+  def position(self, offset):
+    if offset is None:
+      return None, None
+    return (0, offset - self.start), (1, offset - self.start)
+
+def moved_position(source, position, start):
+  # The line or column of a ClassPositions position, for its class at start
+  if position is None or source is None:
+    return None
+  index, offset = position
+  return source.position(start + offset)[index]
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -----------------------------------------------------------------------------
+# vsop_tests.py
+#
+# VSOP checks, each one runs its cases and fails on the first wrong one
+#
+# USAGE:
+#   python3 vsop_tests.py [check ...]
+#
+# -----------------------------------------------------------------------------
+__author__  = "Adrien"
+__version__ = '1.0'
+
+import io
+import random
+import re
+import sys
+
+def test_source(names):
+  text = ""
+  for name in names:
+    with open(f"tests/{name}.vsop") as file:
+      text += file.read()
+  return text
+
+def sem_sources():
+  # Programs that check: chains of factorial classes, the linked list
+  from vsop_bench import factorial_classes
+  return factorial_classes(24), test_source(("linked_list", "factorial"))
+
+def class_tree(rng, count):
+  # A program of `count` classes in a random tree, each with a field of its
+  # own, one holding a new object of another class, and methods over those
+  # of its ancestors
+  parents = {}
+  for i in range(count):
+    parents[f"C{i}"] = rng.choice(["Object"] + list(parents))
+  text = ""
+  for name, parent in parents.items():
+    other = rng.choice(list(parents))
+    text += f"class {name} extends {parent} {{\n  f{name} : int32;\n" \
+      + f"  g{name} : {other} <- new {other};\n" \
+      + "".join(f"  m{j}(x : int32) : int32 {{ let y : int32 <- x in y + {j} }}\n"
+        for j in rng.sample(range(6), rng.randrange(4))) + "}\n"
+  return text
+
+def renamed(rng, text, count=2):
+  # Names swapped for others of the text of the same case, a type name
+  # sometimes for a primitive one: it mostly still parses, often no longer
+  # checks (unknown or wrong types, missing or redefined members)
+  from vsop_lexer import VsopLexer
+  for _ in range(count):
+    names = [m for m in re.finditer(r"\b[A-Za-z][A-Za-z0-9_]*\b", text)
+      if m.group() not in VsopLexer.keywords]
+    m = rng.choice(names)
+    upper = m.group()[0].isupper()
+    if upper and rng.random() < 0.2:
+      name = rng.choice(("int32", "bool", "string", "unit"))
+    else:
+      name = rng.choice([n.group() for n in names if n.group()[0].isupper() == upper])
+    text = text[:m.start()] + name + text[m.end():]
+  return text
+
+def checked(check):
+  # What a semantic analysis shows: its errors and its tree with the static
+  # types, or the exception it raised
+  try:
+    program, errors = check()
+  except Exception as e:
+    return repr(e)
+  return [str(e) for e in errors], dumped(program)
+
+def dumped(program):
+  from vsop_ast import dump
+  if program is None:
+    return None
+  fileobj = io.BytesIO()
+  dump(program, fileobj)
+  return fileobj.getvalue()
+
+def parsed(result):
+  # What a parse result shows: its tree with the offsets, its errors
+  program, errors, lex_errors = result
+  return dumped(program), [str(e) for e in errors], [str(e) for e in lex_errors]
+
+
+### CHECKS
+session_prefixes = ("", "\n\n", "  \t", "// header\n", "(* Copyright\n   header *)\n",
+  "(* a *) // b\n\n")
+session_snippets = (" ", "\n", "// note\n", "(* note *)", "x", "1", ";", "{", "}", "class",
+  "class A { }\n", "(*", "\"", "field : int32;\n")
+
+def edited(rng, text):
+  # A random edit: a snippet inserted, a slice removed or a class repeated
+  choice = rng.random()
+  at = rng.randrange(len(text) + 1)
+  if choice < 0.5:
+    return text[:at] + rng.choice(session_snippets) + text[at:]
+  if choice < 0.8:
+    return text[:at] + text[at + rng.randrange(1, 8):]
+  start = text.find("class", at)
+  if start < 0:
+    return text
+  end = text.find("class", start + 1)
+  end = len(text) if end < 0 else end
+  return text[:at] + text[start:end] + text[at:]
+
+def check_relex(cases=300, steps=10):
+  # VsopLexer.relex gives the tokens and errors of a full tokenize of the
+  # edited text
+  from vsop_lexer import VsopLexer
+  rng = random.Random(5)
+  base = test_source(("factorial", "linked_list", "simple"))
+  lexer = VsopLexer()
+  for case in range(cases):
+    text = base
+    tokens, errors = lexer.tokenize(text)
+    tokens, errors = list(tokens), list(errors)
+    for step in range(steps):
+      at = rng.randrange(len(text) + 1)
+      removed = rng.randrange(4)
+      inserted = rng.choice(session_snippets)
+      new_text = text[:at] + inserted + text[at + removed:]
+      edit = (at, min(at + removed, len(text)), at + len(inserted))
+      tokens, errors = lexer.relex(tokens, text, new_text, [edit], errors)
+      expected_tokens, expected_errors = VsopLexer().tokenize(new_text)
+      got = [(t.type, t.value, t.lexpos) for t in tokens], [str(e) for e in errors]
+      expected = [(t.type, t.value, t.lexpos) for t in expected_tokens], \
+        [str(e) for e in expected_errors]
+      assert got == expected, f"relex case {case} step {step}:\n{new_text}"
+      text = new_text
+  print(f"relex: {cases * steps} edits")
+
+def check_session(cases=200, steps=20):
+  # ParseSession gives what VsopParser.parse does on the same text, and
+  # reuses the classes of a text that starts with a comment or blank lines
+  # when only its last class changes
+  from vsop_parser import VsopParser, ParseSession
+  parser = VsopParser()
+  base = test_source(("factorial", "linked_list", "simple"))
+  rng = random.Random(8)
+  reused = 0
+  for case in range(cases):
+    prefix = session_prefixes[case % len(session_prefixes)]
+    session = ParseSession(VsopParser())
+    clean = prefix + base
+    session.parse(clean)
+    for step in range(steps):
+      # Edits go on from the last text without errors, most would not
+      # parse again once one has any
+      text = edited(rng, clean)
+      expected = parsed(parser.parse(text))
+      got = parsed(session.parse(text))
+      assert got == expected, f"session case {case} step {step}:\n{text}"
+      if not expected[1] and not expected[2]:
+        clean = text
+      reused += session.reused
+
+    session = ParseSession(VsopParser())
+    session.parse(prefix + base)
+    session.parse(prefix + base + "\n")
+    assert session.reused and session.parsed == 1, \
+      f"session case {case}: {session.parsed} parsed {session.reused} reused with {prefix!r}"
+  print(f"session: {cases * steps} edits, {reused} classes reused")
+
+def check_buffer(cases=300):
+  # TokenBuffer reads the same tokens, positions and errors as
+  # VsopRegexLexer.tokenize, both go through scan_spans
+  from vsop_lexer import VsopRegexLexer, TokenBuffer
+  rng = random.Random(3)
+  text = test_source(("factorial", "linked_list", "simple", "test"))
+  for case in range(cases):
+    tokens, errors = VsopRegexLexer().tokenize(text)
+    expected = [(t.type, t.value, t.lexpos, t.lineno, t.column) for t in tokens], \
+      [str(e) for e in errors]
+    buffer = TokenBuffer(text)
+    got = [(buffer.type(i), buffer.value(i), buffer.offset[i], buffer.line[i],
+      buffer.column[i]) for i in range(len(buffer))], [str(e) for e in buffer.errors]
+    assert got == expected, f"buffer case {case}:\n{text}"
+    text = edited(rng, text)
+  print(f"buffer: {cases} texts")
+
+def check_pipeline(cases=200):
+  # Checking each class as soon as it is parsed (on_class) gives the errors
+  # and the tree of a parse then a check
+  from vsop_lexer import SourceFile
+  from vsop_parser import PARSER_BACKENDS
+  from vsop_sem import VsopSem
+  rng = random.Random(9)
+  sources = sem_sources()
+  parsers = {name : backend() for name, backend in PARSER_BACKENDS.items()}
+  checks = 0
+  for case in range(cases):
+    text = sources[case % len(sources)]
+    if case >= len(sources):
+      text = renamed(rng, text)
+    for name, parser in parsers.items():
+      program, errors, lex_errors = parser.parse(text)
+      if errors or lex_errors:
+        break
+      expected = checked(lambda: VsopSem().semantic_analysis(program))
+      sem = VsopSem()
+      def pipelined():
+        sem.begin(SourceFile(text))
+        program, _, _ = parser.parse(text, sem.add_class)
+        return sem.finish(program)
+      got = checked(pipelined)
+      assert got == expected, f"pipeline case {case} ({name}):\n{text}"
+      checks += 1
+  print(f"pipeline: {checks} programs")
+
+def check_dump(cases=50):
+  # load gives back a tree that dumps to the same bytes and prints the same,
+  # parsed (with both parsers, flat or not) or checked, and a loaded parsed
+  # tree checks as the one it was dumped from
+  from vsop_ast import load
+  from vsop_parser import PARSER_BACKENDS
+  from vsop_sem import VsopSem
+  rng = random.Random(14)
+  sources = sem_sources()
+  parsers = [backend(flat=flat) for backend in PARSER_BACKENDS.values()
+    for flat in (False, True)]
+  trees = 0
+  for case in range(cases):
+    text = sources[case % len(sources)]
+    if case >= len(sources):
+      text = renamed(rng, text)
+    for parser in parsers:
+      program, errors, lex_errors = parser.parse(text)
+      if errors or lex_errors:
+        break
+      data = dumped(program)
+      loaded = load(io.BytesIO(data))
+      assert dumped(loaded) == data and str(loaded) == str(program), \
+        f"dump case {case} (parsed):\n{text}"
+      expected = checked(lambda: VsopSem().semantic_analysis(parser.parse(text)[0]))
+      assert checked(lambda: VsopSem().semantic_analysis(loaded)) == expected, \
+        f"dump case {case} (loaded then checked):\n{text}"
+      analysed, sem_errors = VsopSem().semantic_analysis(program)
+      data = dumped(analysed)
+      loaded = load(io.BytesIO(data))
+      assert dumped(loaded) == data, f"dump case {case} (checked):\n{text}"
+      assert sem_errors or str(loaded) == str(analysed), \
+        f"dump case {case} (checked):\n{text}"
+      trees += 2
+  print(f"dump: {trees} trees")
+
+def check_hierarchy(cases=200):
+  # ClassHierarchy answers is_subtype and lca as a walk up the parent chain
+  # does, on random trees of classes listed in random order
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  rng = random.Random(18)
+  parser = VsopParser()
+  pairs = 0
+  for case in range(cases):
+    parents = {}
+    for i in range(rng.randrange(1, 40)):
+      parents[f"C{i}"] = rng.choice(["Object"] + list(parents))
+    names = list(parents)
+    rng.shuffle(names)
+    text = "".join(f"class {name} extends {parents[name]} {{ }}\n" for name in names) \
+      + "class Main { main() : int32 { 0 } }\n"
+    sem = VsopSem()
+    _, errors = sem.semantic_analysis(parser.parse(text)[0])
+    assert not errors, f"hierarchy case {case}: {errors}"
+    classes = sem.program.list_class
+    def ancestors(name):
+      chain = []
+      while name is not None:
+        chain.append(name)
+        name = classes[name].parent
+      return chain
+    for a in classes:
+      for b in classes:
+        assert sem.hierarchy.is_subtype(a, b) == (b in ancestors(a)), \
+          f"hierarchy case {case}: is_subtype({a}, {b})\n{text}"
+        expected = next(name for name in ancestors(a) if name in ancestors(b))
+        assert sem.hierarchy.lca(a, b) == expected, \
+          f"hierarchy case {case}: lca({a}, {b})\n{text}"
+        pairs += 1
+      for other in ("int32", "bool", "string", "unit", "Missing"):
+        assert not sem.hierarchy.is_subtype(a, other) \
+          and not sem.hierarchy.is_subtype(other, a), \
+          f"hierarchy case {case}: is_subtype with {other}\n{text}"
+  print(f"hierarchy: {pairs} pairs")
+
+class Collision(str):
+  # A name whose hash is shared by every other one
+  def __hash__(self):
+    return 20
+
+def check_members(cases=300, steps=30):
+  # Members tables read as the dicts they stand for, and including() leaves
+  # the old table as it was; the tables of a checked program are the
+  # members of the ancestors of each class, nearest first
+  from vsop_sem import Members, VsopSem
+  from vsop_parser import VsopParser
+  rng = random.Random(20)
+  for case in range(cases):
+    pool = [f"m{i}" for i in range(rng.randrange(1, 200))] + \
+      [Collision(f"c{i}") for i in range(rng.randrange(4))]
+    tables = [(Members(), {})]
+    for step in range(steps):
+      table, expected = rng.choice(tables)
+      members = {rng.choice(pool) : step for _ in range(rng.randrange(8))}
+      tables.append((table.including(members), {**expected, **members}))
+    for table, expected in tables:
+      assert dict(table.items()) == expected and len(table) == len(expected), \
+        f"members case {case}: {dict(table.items())} != {expected}"
+      for name in pool + ["absent", Collision("absent")]:
+        assert (name in table) == (name in expected) \
+          and table.get(name, -1) == expected.get(name, -1), \
+          f"members case {case}: {name}"
+
+  parser = VsopParser()
+  for case in range(cases // 10):
+    text = class_tree(rng, rng.randrange(1, 30)) + sem_sources()[0]
+    program, errors = VsopSem().semantic_analysis(parser.parse(text)[0])
+    assert not errors, f"members program {case}: {[str(e) for e in errors]}"
+    for cl in program.list_class.values():
+      fields, methods = {}, {}
+      parent = cl.parent
+      while parent is not None:
+        fields = {**program.list_class[parent].fields, **fields}
+        methods = {**program.list_class[parent].methods, **methods}
+        parent = program.list_class[parent].parent
+      got = {name : id(member) for name, member in cl.inhe_fields.items()}, \
+        {name : id(member) for name, member in cl.inhe_methods.items()}
+      assert got == ({name : id(member) for name, member in fields.items()},
+        {name : id(member) for name, member in methods.items()}), \
+        f"members program {case}: tables of {cl.name}\n{text}"
+  print(f"members: {cases * (steps + 1)} tables")
+
+def check_semsession(cases=40, steps=15):
+  # SemSession gives the errors, or the exception, of a full VsopSem check
+  # of each version of a program edited by renames
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem, SemSession
+  from vsop_bench import factorial_classes
+  rng = random.Random(23)
+  parser = VsopParser()
+  def outcome(check):
+    try:
+      return [str(e) for e in check()]
+    except Exception as e:
+      return repr(e)
+  reused = 0
+  for case in range(cases):
+    text = class_tree(rng, rng.randrange(2, 12)) + factorial_classes(8)
+    session = SemSession()
+    for step in range(steps):
+      program, errors, lex_errors = parser.parse(text)
+      if not errors and not lex_errors:
+        expected = outcome(lambda: VsopSem().semantic_analysis(parser.parse(text)[0])[1])
+        got = outcome(lambda: session.check(program))
+        assert got == expected, f"semsession case {case} step {step}:\n{text}"
+        reused += session.reused
+        last = text
+      text = renamed(rng, last, 1)
+  print(f"semsession: {cases * steps} versions, {reused} classes reused")
+
+# Wrappers of an expression of a type, by the type they give. A few are
+# picked whatever the type of the expression is, to get errors
+deep_wrappers = {
+  "int32" : (("({} + 1)", "int32"), ("-{}", "int32"), ("(if b then {} else a)", "int32"),
+    ("(let y : int32 <- {} in y)", "int32"), ("{{ (); {} }}", "int32"),
+    ("self.id({})", "int32"), ("({} < 2)", "bool"), ("(new Main).id({})", "int32")),
+  "bool" : (("not {}", "bool"), ("(if {} then a else 0)", "int32"), ("({} = b)", "bool"),
+    ("(let y : bool <- {} in y)", "bool"), ("(while {} do ())", "unit")),
+  "unit" : (("{{ {}; a }}", "int32"), ("(if b then {} else ())", "unit")),
+}
+
+def deep_expression(rng, depth, wrong=0.01):
+  # An expression `depth` wrappers deep, a `wrong` part of them picked
+  # whatever the type
+  text, kind = "a", "int32"
+  for _ in range(depth):
+    pool = deep_wrappers[kind]
+    if rng.random() < wrong:
+      pool = rng.choice(list(deep_wrappers.values()))
+    wrapper, kind = rng.choice(pool)
+    text = wrapper.format(text)
+  return text
+
+def check_deep(cases=40, depth=1500):
+  # check_expression on its explicit stack gives the static types, errors
+  # and exceptions of a plain recursion over the same visit_ generators, on
+  # expressions nested deep, and needs no recursion of its own far deeper
+  from types import GeneratorType
+  from vsop_parser import VsopParser
+  from vsop_sem import VsopSem
+  class RecursiveSem(VsopSem):
+    def check_expression(self, express, scope):
+      express_type = self.dispatch[type(express)](self, express, scope)
+      if type(express_type) is GeneratorType:
+        visit = express_type
+        express_type = None
+        try:
+          while True:
+            express_type = self.check_expression(visit.send(express_type), scope)
+        except StopIteration as done:
+          express_type = done.value
+      express.static_type = express_type
+      return express_type
+  rng = random.Random(25)
+  parser = VsopParser()
+  def program(body):
+    return ("class Main {\n  id(x : int32) : int32 { x }\n"
+      f"  f(a : int32, b : bool) : int32 {{ {body} }}\n  main() : int32 {{ 0 }}\n}}\n")
+  limit = sys.getrecursionlimit()
+  for case in range(cases):
+    text = program(deep_expression(rng, rng.randrange(1, depth)))
+    expected = None
+    sys.setrecursionlimit(20 * depth + limit)
+    try:
+      expected = checked(lambda: RecursiveSem().semantic_analysis(parser.parse(text)[0]))
+    finally:
+      sys.setrecursionlimit(limit)
+    got = checked(lambda: VsopSem().semantic_analysis(parser.parse(text)[0]))
+    assert got == expected, f"deep case {case}:\n{text}"
+  # Well typed but for the argument of id, whose error quotes the whole
+  # expression
+  deep = deep_expression(rng, 20 * depth, 0)
+  text = program(f"{{ self.id(({deep}) = ({deep})); 0 }}")
+  got = checked(lambda: VsopSem().semantic_analysis(parser.parse(text)[0]))
+  assert type(got) is tuple and len(got[0]) == 1, \
+    f"deep check at depth {20 * depth}: {got}"
+  print(f"deep: {cases} expressions up to {depth} deep, one {20 * depth} deep")
+
+# (text, max_errors, the errors both parsers report, lexical ones first)
+recovery_cases = (
+  # One error per method, class and argument list
+  ("class Main {\n  f() : int32 { 1 + }\n  g() : int32 { if then 2 }\n"
+    "  main() : int32 { 0 }\n}\n", None,
+    ["2:21: syntax error: Unexpected Token", "3:20: syntax error: Unexpected Token"]),
+  ("class A {\n  x : int32 <- ;\n}\nclass Main {\n  main() : int32 { (1 }\n}\n", None,
+    ["2:16: syntax error: Missing semicolon", "5:23: syntax error: Unexpected Token"]),
+  ("class Main {\n  main() : int32 { f(1 2); self.g(3 +); 0 }\n}\n", None,
+    ["2:24: syntax error: Unexpected Token", "2:38: syntax error: Unexpected Token"]),
+  # A garbled class header keeps its body
+  ("class A { }\nclas C0 {\n  f() : int32 { 0x1F + 42 : 3 }\n}\n"
+    "clss Main {\n  main() : int32 { 1 + }\n}\n"
+    "clas} C3 extends A {\n  k() : bool { true false }\n}\n", None,
+    ["2:1: syntax error: Unexpected Token", "3:27: syntax error: Unexpected Token",
+     "6:24: syntax error: Unexpected Token", "8:1: syntax error: Unexpected Token",
+     "9:21: syntax error: Unexpected Token"]),
+  # Error rules only relabel the error reported at their own token
+  ("class A { }\n{lass C0 {\n  f() : int32 { 1 }\n}\n", None,
+    ["2:1: syntax error: Unexpected Token", "2:7: syntax error: Unexpected Token"]),
+  (")class else extends Object { }\n", None,
+    ["1:1: syntax error: Unexpected Token", "1:8: syntax error: Unexpected class name"]),
+  ("class Main {\n  x : int32\n  y : ;\n  main() : int32 { 0 }\n}\n", None,
+    ["3:3: syntax error: Missing semicolon", "3:7: syntax error: Missing or incorrect type"]),
+  # --max-errors
+  ("class Main {\n  f() : int32 { 1 + }\n  g() : int32 { if then 2 }\n"
+    "  main() : int32 { 0 }\n}\n", 1, ["2:21: syntax error: Unexpected Token"]),
+  ("class A { }\nclas C0 {\n  f() : int32 { 0x1F + 42 : 3 }\n}\n"
+    "clss Main {\n  main() : int32 { 1 + }\n}\n", 2,
+    ["2:1: syntax error: Unexpected Token", "3:27: syntax error: Unexpected Token"]),
+  ("class Main {\n  x : int32\n  main() : int32 { 0 }\n}\n", 1,
+    ["3:3: syntax error: Missing semicolon"]),
+  # No token is read after the last one: the $ stays unlexed
+  ("class Main {\n  main() : int32 { 1 + }\n  f() : int32 { 2 }\n}\n$\n", 1,
+    ["2:24: syntax error: Unexpected Token"]),
+  ("class Main {\n  main() : int32 { 1 + }\n  f() : int32 { 2 }\n}\n$\n", 2,
+    ["5:1: lexical error: Invalid character", "2:24: syntax error: Unexpected Token"]),
+)
+
+def check_recovery():
+  # Syntax errors after the first one are still reported, with their
+  # own message, up to max_errors, and a class lost to an error leaves no
+  # None in the program
+  from vsop_parser import PARSER_BACKENDS
+  for name, backend in PARSER_BACKENDS.items():
+    for case, (text, max_errors, expected) in enumerate(recovery_cases):
+      program, errors, lex_errors = backend().parse(text, max_errors=max_errors)
+      errors = [str(e) for e in lex_errors + errors]
+      assert errors == expected, f"recovery case {case} ({name}): {errors}"
+      assert program is None or None not in program.list_class, \
+        f"recovery case {case} ({name}): {program.list_class}"
+  print(f"recovery: {len(recovery_cases)} cases")
+
+
+checks = {
+  'buffer' : check_buffer,
+  'relex' : check_relex,
+  'session' : check_session,
+  'pipeline' : check_pipeline,
+  'dump' : check_dump,
+  'hierarchy' : check_hierarchy,
+  'members' : check_members,
+  'semsession' : check_semsession,
+  'deep' : check_deep,
+  'recovery' : check_recovery,
+}
+
+### MAIN
+if __name__ == "__main__":
+  names = sys.argv[1:] or list(checks)
+  unknown = [name for name in names if name not in checks]
+  if unknown:
+    print("vsop_tests.py [" + " | ".join(checks) + " ...]")
+    exit(1)
+  for name in names:
+    checks[name]()